@@ -1,43 +1,25 @@
-import argparse
-from lxml import etree
-import pandas as pd
-from collections import defaultdict
-
-def tbx_to_excel(input_path: str, output_path: str):
-    tree = etree.parse(input_path)
-    root = tree.getroot()
-
-    entries = []
-
-    for term_entry in root.findall(".//termEntry"):
-        entry = defaultdict(list)
-
-        for descrip in term_entry.findall("descrip"):
-            dtype = descrip.get("type")
-            lang = descrip.get("{http://www.w3.org/XML/1998/namespace}lang")
-            key = dtype if not lang else f"{dtype}_{lang}"
-            if descrip.text:
-                entry[key].append(descrip.text.strip())
-
-        for lang_set in term_entry.findall("langSet"):
-            lang = lang_set.get("{http://www.w3.org/XML/1998/namespace}lang")
-            if lang:
-                terms = [term.text.strip() for term in lang_set.findall(".//term") if term.text]
-                if terms:
-                    entry[lang].extend(terms)
-
-        flat_entry = {k: "; ".join(v) for k, v in entry.items()}
-        entries.append(flat_entry)
-
-    df = pd.DataFrame(entries)
-    df.fillna("", inplace=True)
-    df.to_excel(output_path, index=False)
-    print(f"Excel file successfully written to: {output_path}")
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Convert enriched TBX file to Excel.")
-    parser.add_argument("-i", "--input", required=True, help="Path to the input TBX file.")
-    parser.add_argument("-o", "--output", required=True, help="Path to the output Excel (.xlsx) file.")
-    args = parser.parse_args()
-
-    tbx_to_excel(args.input, args.output)
+import argparse
+from mtuoc_tbx.progress import add_arguments, run_with_arguments
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert enriched TBX file to Excel, CSV, TSV or Parquet.")
+    parser.add_argument("-i", "--input", required=True, help="Path to the input TBX file.")
+    parser.add_argument("-o", "--output", required=True, help="Path to the output file (.xlsx, .csv, .tsv or .parquet).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Parse shards of the TBX file in this many worker processes (default: single process).")
+    parser.add_argument("-c", "--columns", default=None, help="Comma-separated output columns. Skips the first pass that discovers them for streamed outputs.")
+    parser.add_argument("--write-only", action="store_true", help="Stream .xlsx output with a constant-memory write-only workbook.")
+    parser.add_argument("--value-separator", default="; ", help="Separator used to join the terms or values of a multi-valued cell (default: '; ').")
+    parser.add_argument("-l", "--langs", default=None, help="Comma-separated languages to read (e.g. ca,es,en); other langSets and language-specific descrips are skipped, and so are entries without any of them.")
+    parser.add_argument("-f", "--fields", default=None, help="Comma-separated descrip types to read (e.g. subjectField,definition); other descrips are skipped.")
+    parser.add_argument("-s", "--subject-field", action="append", default=None, help="Only read entries with this subject field (case-insensitive); repeat for several.")
+    add_arguments(parser)
+    args = parser.parse_args()
+    from mtuoc_tbx import Projection, tbx_to_excel
+
+    columns = args.columns.split(",") if args.columns else None
+    projection = None
+    if args.langs or args.fields or args.subject_field:
+        projection = Projection(args.langs.split(",") if args.langs else None,
+                                args.fields.split(",") if args.fields else None, args.subject_field)
+    run_with_arguments(args, tbx_to_excel, args.input, args.output, args.workers, columns, args.write_only, value_separator=args.value_separator, projection=projection)
+    print(f"File successfully written to: {args.output}")
@@ -0,0 +1,17 @@
+import argparse
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a TBX file into a memory-mapped termbase index for fast lookup.")
+    parser.add_argument("-i", "--input", required=True, help="Path to the input TBX file.")
+    parser.add_argument("-o", "--output", required=True, help="Path to the output index file.")
+    parser.add_argument("--termcat", action="store_true", help="The input is a TERMCAT-style XML file instead of TBX.")
+    parser.add_argument("--no-fuzzy", action="store_true", help="Leave out the n-gram tables for fuzzy lookup (smaller index, faster to build).")
+    args = parser.parse_args()
+    from mtuoc_tbx.index import build_index
+    from mtuoc_tbx.reader import iter_term_entry_elements
+
+    from mtuoc_tbx.termcat import iter_term_entries
+
+    term_entries = iter_term_entries(args.input) if args.termcat else iter_term_entry_elements(args.input)
+    count = build_index(term_entries, args.output, fuzzy=not args.no_fuzzy)
+    print(f"Index with {count} entries successfully written to: {args.output}")
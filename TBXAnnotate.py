@@ -0,0 +1,34 @@
+import argparse
+import sys
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annotate a corpus with the terms of a TBX termbase (one sentence per line).")
+    parser.add_argument("-t", "--tbx", required=True, help="Path to the TBX termbase.")
+    parser.add_argument("-s", "--source", required=True, help="Language of the corpus.")
+    parser.add_argument("-T", "--targets", default=None, help="Comma-separated target languages to report (default: all other languages).")
+    parser.add_argument("-i", "--input", nargs="+", default=None, help="Input corpus files (default: stdin).")
+    parser.add_argument("-o", "--output", default=None, help="Output directory for <file>.jsonl results, one per input file; needs --input (default: stdout).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Annotate input files in this many worker processes (default: single process).")
+    parser.add_argument("--ignore-case", action="store_true", help="Match terms case-insensitively.")
+    parser.add_argument("--all-matches", action="store_true", help="Report overlapping matches instead of the leftmost-longest ones.")
+    parser.add_argument("--value-separator", default="; ", help="Separator used to join the externalCrossReference values of an entry (default: '; ').")
+    parser.add_argument("--substrings", action="store_true", help="Also match terms inside longer words.")
+    args = parser.parse_args()
+    if args.output and not args.input:
+        parser.error("--output needs --input files; without them the corpus is read from stdin and written to stdout.")
+    from mtuoc_tbx.annotate import load_annotator, annotate_lines, annotate_files
+
+    targets = args.targets.split(",") if args.targets else None
+    annotator = load_annotator(args.tbx, args.source, targets, args.ignore_case, args.value_separator)
+    whole_words = not args.substrings
+    longest = not args.all_matches
+
+    if args.output:
+        count = annotate_files(annotator, args.input, args.output, args.workers, whole_words, longest)
+        print(f"{count} sentences annotated to: {args.output}", file=sys.stderr)
+    elif args.input:
+        for path in args.input:
+            with open(path, encoding="utf-8") as f:
+                sys.stdout.writelines(annotate_lines(annotator, f, whole_words, longest))
+    else:
+        sys.stdout.writelines(annotate_lines(annotator, sys.stdin, whole_words, longest))
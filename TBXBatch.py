@@ -0,0 +1,29 @@
+import argparse
+import json
+import os
+import sys
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many conversions in one process pool, from a directory or a job manifest.")
+    parser.add_argument("-i", "--input-dir", default=None, help="Convert every .csv, .tsv, .xlsx, .xml (TERMCAT) and .tbx file in this directory.")
+    parser.add_argument("-o", "--output-dir", default=None, help="Output directory for --input-dir (default: the input directory).")
+    parser.add_argument("-m", "--manifest", default=None, help="JSON lines file with one job per line: {\"direction\", \"input\", \"output\", \"options\"}.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: one per CPU).")
+    args = parser.parse_args()
+    from mtuoc_tbx.service import directory_jobs, manifest_jobs, run_batch
+
+    if args.manifest:
+        jobs = manifest_jobs(args.manifest)
+    elif args.input_dir:
+        output_dir = args.output_dir or args.input_dir
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = directory_jobs(args.input_dir, output_dir)
+    else:
+        parser.error("one of --input-dir or --manifest is required")
+
+    failed = 0
+    for result in run_batch(jobs, args.workers):
+        print(json.dumps(result, ensure_ascii=False))
+        failed += result["status"] != "ok"
+    print(f"{len(jobs) - failed} of {len(jobs)} conversions succeeded.", file=sys.stderr)
+    sys.exit(1 if failed else 0)
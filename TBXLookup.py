@@ -0,0 +1,30 @@
+import argparse
+import json
+import sys
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up terms in a termbase index built with TBX2Index.")
+    parser.add_argument("-x", "--index", required=True, help="Path to the index file.")
+    parser.add_argument("-l", "--lang", required=True, help="Language of the terms to look up.")
+    parser.add_argument("-t", "--term", action="append", default=None, help="Term to look up; repeat for several terms (default: one term per line from stdin).")
+    parser.add_argument("-f", "--fold", action="store_true", help="Case and diacritic insensitive lookup.")
+    parser.add_argument("-k", "--fuzzy", type=int, default=None, metavar="K", help="Fuzzy lookup: the K closest terms by edit distance (case and diacritic insensitive). Prints the matched term and its similarity before each entry.")
+    parser.add_argument("-d", "--max-distance", type=int, default=None, help="With --fuzzy, the largest edit distance of a match (default: a quarter of the length of the term).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="With --fuzzy, spread the terms over this many processes.")
+    args = parser.parse_args()
+    from mtuoc_tbx.index import TermIndex
+
+    terms = args.term if args.term else (line.rstrip("\n") for line in sys.stdin)
+    with TermIndex(args.index) as index:
+        if args.fuzzy:
+            terms = list(terms)
+            results = index.fuzzy_many(terms, args.lang, args.fuzzy, args.max_distance, workers=args.workers)
+            for term, matches in zip(terms, results):
+                for distance, similarity, match, entry_ids in matches:
+                    for entry_id in entry_ids:
+                        entry = index.entry(entry_id)
+                        print(f"{term}\t{match}\t{similarity:.2f}\t" + json.dumps(entry, ensure_ascii=False))
+        else:
+            for term in terms:
+                for entry in index.search(term, args.lang, args.fold):
+                    print(term + "\t" + json.dumps(entry, ensure_ascii=False))
@@ -0,0 +1,21 @@
+import argparse
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge several TBX files into one, combining duplicate entries.")
+    parser.add_argument("-i", "--input", required=True, nargs="+", help="Input TBX files.")
+    parser.add_argument("-o", "--output", required=True, help="Path to the output TBX file. A .gz, .xz, .bz2 or .zst file is compressed.")
+    parser.add_argument("-b", "--by", choices=["ref", "term"], default="ref", help="Duplicate key: externalCrossReference (ref) or normalized term (term) (default: ref).")
+    parser.add_argument("-l", "--lang", default=None, help="Language of the key terms when merging by term.")
+    parser.add_argument("-p", "--partitions", type=int, default=None, help="Number of on-disk hash partitions; more partitions use less memory (default: 64).")
+    parser.add_argument("--tmp-dir", default=None, help="Directory for the temporary partition files (default: system temp directory).")
+    parser.add_argument("--compact", action="store_true", help="Write the TBX without indentation.")
+    parser.add_argument("--dialect", choices=["legacy", "tbx3"], default="legacy", help="TBX dialect of the output (the inputs may be of either): legacy termEntry/langSet/tig, or TBX v3 (TBX-Basic) conceptEntry/langSec/termSec (default: legacy).")
+    args = parser.parse_args()
+    if args.by == "term" and not args.lang:
+        parser.error("--by term needs --lang, the language of the key terms.")
+    from mtuoc_tbx.merge import merge_tbx, DEFAULT_PARTITIONS
+
+    stats = merge_tbx(args.input, args.output, args.by, args.lang, args.partitions or DEFAULT_PARTITIONS, args.tmp_dir,
+                      args.compact, args.dialect)
+    print(f"{stats['read']} entries read, {stats['written']} written.")
+    print(f"TBX file successfully written to: {args.output}")
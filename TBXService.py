@@ -0,0 +1,22 @@
+import argparse
+import asyncio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-running local conversion service (HTTP on localhost or a Unix socket).")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument("-p", "--port", type=int, default=8765, help="Port to listen on (default: 8765).")
+    parser.add_argument("-s", "--socket", default=None, help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: one per CPU).")
+    parser.add_argument("--max-pending", type=int, default=None, help="Jobs accepted at a time; further requests wait (default: 4 per worker).")
+    parser.add_argument("-d", "--work-dir", default=None, help="Directory that POST /jobs outputs must be written under; relative outputs are taken from it (default: current directory).")
+    args = parser.parse_args()
+    from mtuoc_tbx.service import ConversionService
+
+    service = ConversionService(args.workers, args.max_pending, args.work_dir)
+    print(f"Conversion service listening on {args.socket or f'http://{args.host}:{args.port}'}")
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
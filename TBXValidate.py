@@ -0,0 +1,48 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check a TBX file in one streaming pass and print statistics: empty terms, langSets without xml:lang, duplicate terms, unexpected descrip types and, optionally, schema errors, each with its line number.")
+    parser.add_argument("-i", "--input", required=True, help="Path to the input TBX file (.gz, .xz, .bz2 or .zst is decompressed).")
+    parser.add_argument("-s", "--schema", nargs="?", const="core", default=None, help="Also validate every termEntry against a .dtd, .rng or .xsd file whose root is termEntry (default without FILE: the bundled TBX core termEntry DTD).")
+    parser.add_argument("-t", "--descrip-types", nargs="+", default=None, help="Expected descrip types (default: externalCrossReference subjectField definition).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Split an uncompressed file over this many processes. Only the termEntry elements are checked.")
+    parser.add_argument("-m", "--max-errors", type=int, default=None, help="Problems listed; the rest are only counted (default: 1000).")
+    parser.add_argument("--json", default=None, help="Also save the statistics and problems as JSON to this file.")
+    parser.add_argument("--progress", action="store_true", help="Report the entries checked and entries/s on stderr.")
+    args = parser.parse_args()
+    from mtuoc_tbx.progress import Progress, print_progress
+    from mtuoc_tbx.validate import DESCRIP_TYPES, MAX_ERRORS, validate_tbx
+
+    progress = Progress(print_progress) if args.progress else None
+    start = time.perf_counter()
+    report = validate_tbx(args.input, args.descrip_types or DESCRIP_TYPES, args.schema, args.workers,
+                          MAX_ERRORS if args.max_errors is None else args.max_errors, progress)
+    seconds = time.perf_counter() - start
+    if progress is not None:
+        progress.finish()
+
+    for line, code, message in report["errors"]:
+        print(f"{args.input}:{line}: {code}: {message}")
+    megabytes = os.path.getsize(args.input) / (1 << 20)
+    print(f"{report['entries']} entries, {megabytes:.1f} MB in {seconds:.2f} s ({megabytes / seconds if seconds else 0:.1f} MB/s)")
+    print("language\tlangSets\tterms")
+    for lang in sorted(report["lang_sets"]):
+        print(f"{lang or '(none)'}\t{report['lang_sets'][lang]}\t{report['terms'][lang]}")
+    if report["subject_fields"]:
+        print("subjectField\tentries")
+        for field, count in report["subject_fields"].most_common():
+            print(f"{field}\t{count}")
+    print("descrip type\tcount")
+    for type_, count in report["descrip_types"].most_common():
+        print(f"{type_ or '(none)'}\t{count}")
+    total = sum(report["error_counts"].values())
+    print(f"{total} problems" + "".join(f", {count} {code}" for code, count in report["error_counts"].most_common()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dict(report, seconds=round(seconds, 3)), f, ensure_ascii=False, indent=2)
+    sys.exit(1 if total else 0)
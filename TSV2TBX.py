@@ -1,49 +1,22 @@
-import argparse
-import pandas as pd
-from lxml import etree
-
-def tsv_to_tbx(input_path: str, output_path: str):
-    df = pd.read_csv(input_path, sep="\t", dtype=str).fillna("")
-
-    tbx = etree.Element("tbx")
-    body = etree.SubElement(tbx, "body")
-
-    for _, row in df.iterrows():
-        term_entry = etree.SubElement(body, "termEntry")
-
-        for col, val in row.items():
-            if not val:
-                continue
-            if col.startswith("definition_"):
-                lang = col.replace("definition_", "")
-                for definition in val.split("; "):
-                    descrip = etree.SubElement(term_entry, "descrip", type="definition")
-                    descrip.attrib["{http://www.w3.org/XML/1998/namespace}lang"] = lang
-                    descrip.text = definition
-            elif col == "externalCrossReference":
-                for ref in val.split("; "):
-                    descrip = etree.SubElement(term_entry, "descrip", type="externalCrossReference")
-                    descrip.text = ref
-            elif col == "subjectField":
-                for subject in val.split("; "):
-                    descrip = etree.SubElement(term_entry, "descrip", type="subjectField")
-                    descrip.text = subject
-            else:
-                lang_set = etree.SubElement(term_entry, "langSet", attrib={
-                    "{http://www.w3.org/XML/1998/namespace}lang": col
-                })
-                for term in val.split("; "):
-                    tig = etree.SubElement(lang_set, "tig")
-                    term_elem = etree.SubElement(tig, "term")
-                    term_elem.text = term
-
-    etree.ElementTree(tbx).write(output_path, encoding="UTF-8", xml_declaration=True, pretty_print=True)
-    print(f"TBX file successfully saved to: {output_path}")
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Convert TSV to TBX.")
-    parser.add_argument("-i", "--input", required=True, help="Input TSV file (with header row).")
-    parser.add_argument("-o", "--output", required=True, help="Output TBX file.")
-    args = parser.parse_args()
-
-    tsv_to_tbx(args.input, args.output)
+import argparse
+from mtuoc_tbx.progress import add_arguments, run_with_arguments
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert TSV to TBX.")
+    parser.add_argument("-i", "--input", required=True, help="Input TSV file (with header row).")
+    parser.add_argument("-o", "--output", required=True, help="Output TBX file. A .gz, .xz, .bz2 or .zst file is compressed.")
+    parser.add_argument("-c", "--chunk-size", type=int, default=None, help="Read and convert the input in chunks of this many rows (default: read it all at once).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Convert rows in this many worker processes (default: single process).")
+    parser.add_argument("-e", "--engine", choices=["pandas", "csv"], default="pandas", help="Reader: pandas, or csv for the standard library csv module, which starts faster and always streams (default: pandas).")
+    parser.add_argument("--incremental", nargs="?", const="externalCrossReference", default=None, metavar="ID_COLUMN", help="Only re-convert rows that changed since the last run, keyed by ID_COLUMN (default: externalCrossReference).")
+    parser.add_argument("--compact", action="store_true", help="Write the TBX without indentation.")
+    parser.add_argument("--value-separator", default="; ", help="Separator of the terms or values in a multi-valued cell (default: '; ').")
+    parser.add_argument("--dialect", choices=["legacy", "tbx3"], default="legacy", help="TBX dialect of the output: legacy termEntry/langSet/tig, or TBX v3 (TBX-Basic) conceptEntry/langSec/termSec (default: legacy).")
+    add_arguments(parser)
+    args = parser.parse_args()
+    from mtuoc_tbx import tsv_to_tbx
+
+    stats = run_with_arguments(args, tsv_to_tbx, args.input, args.output, args.chunk_size, args.workers, args.incremental, args.engine, compact=args.compact, value_separator=args.value_separator, dialect=args.dialect)
+    if stats:
+        print(f"Rows reused: {stats['reused']}, converted: {stats['converted']}, deleted: {stats['deleted']}")
+    print(f"TBX file successfully saved to: {args.output}")
@@ -0,0 +1,67 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mtuoc_tbx.annotate import TermAutomaton
+
+SYLLABLES = ["ta", "ri", "mo", "cel", "lu", "ba", "nor", "pi", "des", "ga", "vo", "lin"]
+
+def make_terms(count: int, rng: random.Random) -> list:
+    terms = set()
+    while len(terms) < count:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        terms.add(" ".join(words))
+    return sorted(terms)
+
+def make_corpus(terms: list, sentences: int, rng: random.Random) -> list:
+    corpus = []
+    for _ in range(sentences):
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(8, 25))]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(terms))
+        corpus.append(" ".join(words))
+    return corpus
+
+def naive_scan(patterns: list, sentence: str) -> int:
+    # One regex search per term, the approach this benchmark compares against
+    return sum(1 for pattern in patterns for _ in pattern.finditer(sentence))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annotation throughput of the Aho-Corasick matcher against a per-term regex scan.")
+    parser.add_argument("-t", "--terms", type=int, default=100_000, help="Number of synthetic terms (default: 100000).")
+    parser.add_argument("-n", "--sentences", type=int, default=20_000, help="Number of synthetic sentences (default: 20000).")
+    parser.add_argument("--naive-sentences", type=int, default=20, help="Sentences timed with the regex scan (default: 20).")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    terms = make_terms(args.terms, rng)
+    corpus = make_corpus(terms, args.sentences, rng)
+
+    start = time.perf_counter()
+    automaton = TermAutomaton()
+    for term_id, term in enumerate(terms):
+        automaton.add(term, term_id)
+    automaton.build()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matches = sum(len(automaton.find(sentence)) for sentence in corpus)
+    ac = time.perf_counter() - start
+
+    patterns = [re.compile(r"\b" + re.escape(term) + r"\b") for term in terms]
+    sample = corpus[:args.naive_sentences]
+    start = time.perf_counter()
+    for sentence in sample:
+        naive_scan(patterns, sentence)
+    naive = time.perf_counter() - start
+
+    print(f"terms: {len(terms)}, sentences: {len(corpus)}, matches: {matches}")
+    print(f"automaton build:    {build:.2f} s")
+    print(f"aho-corasick:       {len(corpus) / ac:,.0f} sentences/s")
+    print(f"per-term regex:     {len(sample) / naive:,.1f} sentences/s")
+    print(f"speedup: {(len(corpus) / ac) / (len(sample) / naive):,.0f}x")
@@ -0,0 +1,73 @@
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import mtuoc_tbx.cells as cells
+import mtuoc_tbx.model as model
+import mtuoc_tbx.reader as reader
+import mtuoc_tbx.tabular as tabular
+from generators import LANGS, make_terms
+from mtuoc_tbx.model import StringPool, TermStore
+from mtuoc_tbx.tabular import classify_columns, row_to_term_entry
+
+SUBJECTS = ["law", "medicine", "chemistry; biology", "economics; law", "agriculture", ""]
+
+def make_rows(rows: int, langs: int, definitions: int, seed: int = 0) -> tuple:
+    # A redundant glossary: a handful of subject fields, definitions drawn from
+    # a pool of the given size, distinct terms
+    rng = random.Random(seed)
+    pool = [f"definition {i} " + " ".join(f"word{rng.randrange(1000)}" for _ in range(12)) for i in range(definitions)]
+    header = ["externalCrossReference", "subjectField"] + LANGS[:langs] + ["definition_en", "definition_ca"]
+    data = []
+    for i in range(rows):
+        row = [f"IATE-{i}", rng.choice(SUBJECTS)]
+        row += ["; ".join(make_terms(rng, lang, 3)) for lang in LANGS[:langs]]
+        row += [rng.choice(pool), rng.choice(pool)]
+        data.append(row)
+    return header, data
+
+def measure(header: list, data: list) -> dict:
+    layout = classify_columns(header)
+    start = time.perf_counter()
+    entries = [row_to_term_entry(values, layout) for values in data]
+    build = time.perf_counter() - start
+
+    store = TermStore()
+    for values in data:
+        store.append_row(values, layout)
+
+    tracemalloc.start()
+    flat = [reader.flatten_term_entry(term_entry) for term_entry in entries]
+    flat_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del flat
+    return {"build": build, "store": store.nbytes(), "flat": flat_bytes}
+
+def without_caches():
+    # The same code paths with splitting and sharing left unmemoized
+    tabular.split_cell = model.split_cell = cells.split_cell.__wrapped__
+    reader.join_cell = model.join_cell = lambda texts, value_separator=cells.VALUE_SEPARATOR: value_separator.join(texts)
+    StringPool.add_shared = StringPool.add
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory of the cell cache on a glossary with repeated descrip values.")
+    parser.add_argument("-n", "--rows", type=int, default=50_000, help="Number of synthetic rows (default: 50000).")
+    parser.add_argument("-l", "--langs", type=int, default=3, help="Language columns per row (default: 3).")
+    parser.add_argument("-d", "--definitions", type=int, default=500, help="Distinct definitions the rows draw from (default: 500).")
+    args = parser.parse_args()
+
+    header, data = make_rows(args.rows, args.langs, args.definitions)
+    cached = measure(header, data)
+    info = cells.cache_info()["split_cell"]
+    without_caches()
+    plain = measure(header, data)
+
+    print(f"rows: {args.rows}, distinct definitions: {args.definitions}, split cache hit rate: "
+          f"{info['hits'] / max(info['hits'] + info['misses'], 1):.0%}")
+    for name, label in (("build", "row_to_term_entry s"), ("store", "TermStore bytes"), ("flat", "flat records bytes")):
+        print(f"{label:20} cached {cached[name]:14,.2f}  uncached {plain[name]:14,.2f}")
@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from generators import write_sheet_delimited, write_sheet_xlsx, write_termcat, write_termbase
+from mtuoc_tbx.progress import peak_rss_mb
+from mtuoc_tbx.service import DIRECTIONS, get_converter
+
+# direction -> generator of its synthetic input
+GENERATORS = {
+    "csv2tbx": lambda path, rows, **kw: write_sheet_delimited(path, rows, ",", **kw),
+    "tsv2tbx": lambda path, rows, **kw: write_sheet_delimited(path, rows, "\t", **kw),
+    "excel2tbx": write_sheet_xlsx,
+    "to2tbx": write_termcat,
+    "tbx2excel": write_termbase,
+}
+WARM_UP_ROWS = 10
+
+def run_conversion(direction: str, warm_up_path: str, input_path: str, output_path: str, options: dict) -> dict:
+    # Runs in a fresh process so that peak RSS belongs to this run only. A
+    # small warm-up conversion loads the modules that the converter imports
+    # lazily (pandas, openpyxl...) before the clock starts.
+    convert = get_converter(direction)
+    convert(warm_up_path, output_path, **options)
+    start = time.perf_counter()
+    convert(input_path, output_path, **options)
+    return {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+def measure(direction: str, warm_up_path: str, input_path: str, output_path: str, options: dict, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            result = executor.submit(run_conversion, direction, warm_up_path, input_path, output_path, options).result()
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+def input_file(work_dir: str, direction: str, rows: int, params: dict) -> str:
+    # Inputs are kept in work_dir and reused by later runs with the same
+    # parameters.
+    ext = DIRECTIONS[direction][2]
+    name = f"{direction}-{rows}-{params['langs']}l-{params['definitions']}d-{params['max_terms']}t-s{params['seed']}{ext}"
+    path = os.path.join(work_dir, name)
+    if not os.path.exists(path):
+        GENERATORS[direction](path + ".part", rows, **params)
+        os.replace(path + ".part", path)
+    return path
+
+def compare(results: list, baseline_path: str, tolerance: float) -> list:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(result["direction"], result["rows"]): result for result in json.load(f)["results"]}
+    slower = []
+    for result in results:
+        old = baseline.get((result["direction"], result["rows"]))
+        if old is None:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        print(f"{result['direction']:<10} {result['rows']:>9}  {old['seconds']:8.2f} s -> {result['seconds']:8.2f} s  ({ratio:.2f}x)")
+        if ratio > tolerance:
+            slower.append(result)
+    return slower
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every conversion direction on synthetic termbases of several sizes.")
+    parser.add_argument("-s", "--scales", default="1000,10000,100000", help="Comma-separated entry counts (default: 1000,10000,100000).")
+    parser.add_argument("-d", "--directions", default=",".join(GENERATORS), help=f"Comma-separated directions (default: {','.join(GENERATORS)}).")
+    parser.add_argument("-l", "--langs", type=int, default=5, help="Language columns per entry (default: 5).")
+    parser.add_argument("--definitions", type=int, default=2, help="definition_* columns per entry (default: 2).")
+    parser.add_argument("--max-terms", type=int, default=3, help="Maximum terms per language cell (default: 3).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the generators (default: 0).")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Runs per measurement; the fastest one is kept (default: 1).")
+    parser.add_argument("--options", default="{}", help='JSON keyword arguments passed to every converter, e.g. \'{"workers": 4}\'.')
+    parser.add_argument("-w", "--work-dir", default=os.path.join(tempfile.gettempdir(), "mtuoc_tbx_bench"), help="Directory for the generated inputs, kept between runs (default: system temp directory).")
+    parser.add_argument("-o", "--output", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("-b", "--baseline", default=None, help="JSON results of a previous run; exit with status 1 if a measurement got slower than --tolerance.")
+    parser.add_argument("-t", "--tolerance", type=float, default=1.2, help="Allowed slowdown factor against the baseline (default: 1.2).")
+    args = parser.parse_args()
+
+    params = {"langs": args.langs, "definitions": args.definitions, "max_terms": args.max_terms, "seed": args.seed}
+    options = json.loads(args.options)
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    results = []
+    for rows in [int(scale) for scale in args.scales.split(",")]:
+        for direction in args.directions.split(","):
+            warm_up_path = input_file(args.work_dir, direction, WARM_UP_ROWS, params)
+            input_path = input_file(args.work_dir, direction, rows, params)
+            output_path = os.path.join(args.work_dir, f"out-{direction}{DIRECTIONS[direction][3]}")
+            result = measure(direction, warm_up_path, input_path, output_path, options, args.repeat)
+            result = {
+                "direction": direction,
+                "rows": rows,
+                "seconds": round(result["seconds"], 3),
+                "entries_per_s": round(rows / result["seconds"]),
+                "peak_rss_mb": result["peak_rss_mb"],
+                "input_mb": round(os.path.getsize(input_path) / (1 << 20), 2),
+                "output_mb": round(os.path.getsize(output_path) / (1 << 20), 2),
+            }
+            os.remove(output_path)
+            results.append(result)
+            print(f"{direction:<10} {rows:>9} entries  {result['seconds']:8.2f} s  {result['entries_per_s']:>9,} entries/s  "
+                  f"peak RSS {result['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "params": params,
+                "options": options,
+                "results": results,
+            }, f, indent=2)
+
+    if args.baseline:
+        slower = compare(results, args.baseline, args.tolerance)
+        sys.exit(1 if slower else 0)
@@ -0,0 +1,81 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from generators import LANGS, write_termbase
+from mtuoc_tbx.index import TermIndex, build_index, edit_distance, normalize
+from mtuoc_tbx.reader import iter_term_entry_elements
+
+def misspell(term: str, rng: random.Random) -> str:
+    # One random substitution, insertion or deletion
+    i = rng.randrange(len(term))
+    edit = rng.choice(("substitute", "insert", "delete"))
+    if edit == "substitute":
+        return term[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + term[i + 1:]
+    if edit == "insert":
+        return term[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + term[i:]
+    return term[:i] + term[i + 1:]
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def timed_queries(index: TermIndex, queries: list, lang: str, limit: int, max_distance: int) -> list:
+    # Latency of every query in milliseconds
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.fuzzy(query, lang, limit, max_distance)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build time, size and query latency of the fuzzy term index against a linear scan.")
+    parser.add_argument("-n", "--entries", type=int, default=300_000, help="Number of synthetic entries, with one language (default: 300000).")
+    parser.add_argument("-q", "--queries", type=int, default=500, help="Number of misspelled queries (default: 500).")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Processes for the batched queries (default: 4).")
+    parser.add_argument("--naive-queries", type=int, default=3, help="Queries timed with the linear scan (default: 3).")
+    args = parser.parse_args()
+
+    lang = LANGS[0]
+    with tempfile.TemporaryDirectory() as work_dir:
+        tbx_path = os.path.join(work_dir, "termbase.tbx")
+        index_path = os.path.join(work_dir, "termbase.idx")
+        write_termbase(tbx_path, args.entries, langs=1, definitions=0, max_terms=3)
+
+        start = time.perf_counter()
+        build_index(iter_term_entry_elements(tbx_path), index_path)
+        build = time.perf_counter() - start
+
+        with TermIndex(index_path) as index:
+            table = index.directory["fuzzy"][lang]
+            vocabulary = [index.vocab_key(table, vocab_id) for vocab_id in range(table["size"])]
+            rng = random.Random(0)
+            queries = [misspell(rng.choice(vocabulary), rng) for _ in range(args.queries)]
+
+            results = {}
+            for name, limit, max_distance in (("top-1", 1, None), ("top-10", 10, None), ("distance <= 2", 10, 2)):
+                results[name] = timed_queries(index, queries, lang, limit, max_distance)
+
+            start = time.perf_counter()
+            index.fuzzy_many(queries, lang, 10, workers=args.workers)
+            batched = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for query in queries[:args.naive_queries]:
+                key = normalize(query, fold=True)
+                sorted((edit_distance(key, term), term) for term in vocabulary)[:10]
+            naive = (time.perf_counter() - start) / args.naive_queries * 1000
+        size = os.path.getsize(index_path) / (1 << 20)
+
+    print(f"entries: {args.entries}, distinct terms: {len(vocabulary)}, queries: {len(queries)}")
+    print(f"index build: {build:.2f} s, {size:.1f} MB")
+    for name, latencies in results.items():
+        print(f"{name:14} p50 {percentile(latencies, 0.5):7.2f} ms  p95 {percentile(latencies, 0.95):7.2f} ms")
+    print(f"batched top-10 ({args.workers} workers): {len(queries) / batched:,.0f} queries/s")
+    print(f"linear scan:   {naive:,.0f} ms/query")
@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from generators import write_termbase
+from mtuoc_tbx.model import store_from_term_entries
+from mtuoc_tbx.reader import iter_entries, iter_term_entry_elements
+
+def traced(build):
+    # (result, seconds, traced peak in bytes) of build()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory held by a termbase as flat dicts and as a TermStore.")
+    parser.add_argument("-n", "--entries", type=int, default=100_000, help="Number of synthetic entries (default: 100000).")
+    parser.add_argument("-l", "--langs", type=int, default=5, help="Language columns per entry (default: 5).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "termbase.tbx")
+        write_termbase(path, args.entries, langs=args.langs)
+
+        dicts, dict_seconds, dict_peak = traced(lambda: list(iter_entries(path)))
+        del dicts
+        store, store_seconds, store_peak = traced(lambda: store_from_term_entries(iter_term_entry_elements(path)))
+
+    print(f"entries: {args.entries}, language columns: {args.langs}")
+    print(f"flat dicts: {dict_peak / (1 << 20):8.1f} MB  {dict_peak / args.entries:6.0f} bytes/entry  {dict_seconds:.2f} s")
+    print(f"TermStore:  {store_peak / (1 << 20):8.1f} MB  {store_peak / args.entries:6.0f} bytes/entry  {store_seconds:.2f} s")
+    print(f"TermStore arrays and text: {store.nbytes() / (1 << 20):.1f} MB")
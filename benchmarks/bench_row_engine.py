@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import sys
+import time
+import pandas as pd
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mtuoc_tbx.tabular import classify_columns, row_to_term_entry
+
+LANGS = ["ca", "es", "en", "fr", "de", "it", "pt", "nl", "eu", "gl"]
+
+def make_sheet(rows: int, langs: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    data = {
+        "externalCrossReference": [f"IATE-{i}" for i in range(rows)],
+        "subjectField": [rng.choice(["law", "medicine", "chemistry; biology", ""]) for _ in range(rows)],
+    }
+    for lang in LANGS[:langs]:
+        data[lang] = [
+            "" if rng.random() < 0.1 else "; ".join(f"{lang} term {i} {k}" for k in range(rng.randint(1, 3)))
+            for i in range(rows)
+        ]
+    for lang in LANGS[:2]:
+        data[f"definition_{lang}"] = [f"{lang} definition {i}" if i % 3 else "" for i in range(rows)]
+    return pd.DataFrame(data)
+
+def legacy_loop(df: pd.DataFrame) -> int:
+    # Row loop used by the converters before the itertuples engine
+    count = 0
+    for _, row in df.iterrows():
+        term_entry = etree.Element("termEntry")
+
+        for col, val in row.items():
+            if not val:
+                continue
+            if col.startswith("definition_"):
+                lang = col.replace("definition_", "")
+                for definition in val.split("; "):
+                    descrip = etree.SubElement(term_entry, "descrip", type="definition")
+                    descrip.attrib["{http://www.w3.org/XML/1998/namespace}lang"] = lang
+                    descrip.text = definition
+            elif col == "externalCrossReference":
+                for ref in val.split("; "):
+                    descrip = etree.SubElement(term_entry, "descrip", type="externalCrossReference")
+                    descrip.text = ref
+            elif col == "subjectField":
+                for subject in val.split("; "):
+                    descrip = etree.SubElement(term_entry, "descrip", type="subjectField")
+                    descrip.text = subject
+            else:
+                lang_set = etree.SubElement(term_entry, "langSet", attrib={
+                    "{http://www.w3.org/XML/1998/namespace}lang": col
+                })
+                for term in val.split("; "):
+                    tig = etree.SubElement(lang_set, "tig")
+                    term_elem = etree.SubElement(tig, "term")
+                    term_elem.text = term
+        count += 1
+    return count
+
+def engine_loop(df: pd.DataFrame) -> int:
+    count = 0
+    layout = classify_columns(df.columns)
+    for values in df.itertuples(index=False, name=None):
+        row_to_term_entry(values, layout)
+        count += 1
+    return count
+
+def timed(func, df: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    func(df)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the iterrows row loop with the itertuples row engine.")
+    parser.add_argument("-r", "--rows", type=int, default=1_000_000, help="Number of synthetic rows (default: 1000000).")
+    parser.add_argument("-l", "--langs", type=int, default=10, help="Number of language columns (default: 10).")
+    args = parser.parse_args()
+
+    df = make_sheet(args.rows, args.langs)
+    legacy = timed(legacy_loop, df)
+    engine = timed(engine_loop, df)
+
+    print(f"rows: {args.rows}, language columns: {args.langs}")
+    print(f"iterrows loop:     {legacy:.2f} s ({args.rows / legacy:,.0f} rows/s)")
+    print(f"itertuples engine: {engine:.2f} s ({args.rows / engine:,.0f} rows/s)")
+    print(f"speedup: {legacy / engine:.2f}x")
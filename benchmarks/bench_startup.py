@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SCRIPTS = [
+    "CSV2TBX.py", "TSV2TBX.py", "Excel2TBX.py", "TBX2Excel.py", "TO2TBX.py",
+    "TBX2Index.py", "TBXLookup.py", "TBXAnnotate.py", "TBXMerge.py", "TBXBatch.py", "TBXService.py",
+]
+# Modules whose import is reported separately
+HEAVY_MODULES = ["pandas", "lxml.etree", "numpy", "openpyxl", "pyarrow"]
+
+def wall_time(command: list, repeat: int) -> float:
+    # Best of repeat runs, in milliseconds
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def import_times(command: list) -> dict:
+    # Cumulative import time in milliseconds of every top-level import, as
+    # reported by python -X importtime
+    result = subprocess.run(command[:1] + ["-X", "importtime"] + command[1:], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+def measure(script: str, repeat: int) -> dict:
+    command = [sys.executable, script, "--help"]
+    imports = import_times(command)
+    return {
+        "script": script,
+        "help_ms": round(wall_time(command, repeat), 1),
+        "imports_ms": round(sum(imports.get(name, 0) for name in imports if "." not in name), 1),
+        "heavy_modules": {name: imports[name] for name in HEAVY_MODULES if name in imports},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start-up time of the command line converters (running --help).")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Runs per script; the best one is kept (default: 5).")
+    parser.add_argument("-o", "--output", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("-b", "--baseline", default=None, help="JSON results of a previous run; exit with status 1 if a script got slower than --tolerance.")
+    parser.add_argument("-t", "--tolerance", type=float, default=1.5, help="Allowed slowdown factor against the baseline (default: 1.5).")
+    args = parser.parse_args()
+
+    interpreter = wall_time([sys.executable, "-c", "pass"], args.repeat)
+    results = [measure(script, args.repeat) for script in SCRIPTS]
+
+    print(f"python -c pass: {interpreter:.1f} ms")
+    for result in results:
+        heavy = ", ".join(f"{name} {ms:.0f} ms" for name, ms in result["heavy_modules"].items()) or "-"
+        print(f"{result['script']:<16} --help {result['help_ms']:7.1f} ms   imports {result['imports_ms']:7.1f} ms   heavy: {heavy}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python_ms": round(interpreter, 1), "scripts": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {result["script"]: result for result in json.load(f)["scripts"]}
+        slower = [result for result in results if result["script"] in baseline
+                  and result["help_ms"] > baseline[result["script"]]["help_ms"] * args.tolerance]
+        for result in slower:
+            print(f"slower than baseline: {result['script']} {result['help_ms']:.1f} ms "
+                  f"(was {baseline[result['script']]['help_ms']:.1f} ms)")
+        sys.exit(1 if slower else 0)
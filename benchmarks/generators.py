@@ -0,0 +1,82 @@
+import csv
+import os
+import random
+import sys
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mtuoc_tbx.tabular import classify_columns, row_to_term_entry
+from mtuoc_tbx.writer import write_tbx
+
+# Synthetic termbases for the benchmarks. Every generator is seeded, so the
+# same arguments always give the same file.
+
+LANGS = ["ca", "es", "en", "fr", "de", "it", "pt", "nl", "eu", "gl"]
+SUBJECTS = ["law", "medicine", "chemistry; biology", "economics", ""]
+SYLLABLES = ["ta", "ri", "mo", "cel", "lu", "ba", "nor", "pi", "des", "ga", "vo", "lin"]
+
+def make_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+def make_terms(rng: random.Random, lang: str, max_terms: int) -> list:
+    return [f"{lang} " + " ".join(make_word(rng) for _ in range(rng.randint(1, 3)))
+            for _ in range(rng.randint(1, max_terms))]
+
+def sheet_header(langs: int, definitions: int) -> list:
+    return (["externalCrossReference", "subjectField"] + LANGS[:langs]
+            + [f"definition_{lang}" for lang in LANGS[:definitions]])
+
+def iter_sheet_rows(rows: int, langs: int = 5, definitions: int = 2, max_terms: int = 3,
+                    empty: float = 0.1, seed: int = 0):
+    # Rows matching sheet_header(): multi-term cells are "; "-separated and
+    # a fraction of the language cells is left empty.
+    rng = random.Random(seed)
+    for i in range(rows):
+        row = [f"IATE-{i}", rng.choice(SUBJECTS)]
+        for lang in LANGS[:langs]:
+            row.append("" if rng.random() < empty else "; ".join(make_terms(rng, lang, max_terms)))
+        for lang in LANGS[:definitions]:
+            row.append(f"{lang} definition " + " ".join(make_word(rng) for _ in range(rng.randint(5, 15))) if i % 3 else "")
+        yield row
+
+def write_sheet_delimited(path: str, rows: int, sep: str = ",", langs: int = 5, definitions: int = 2,
+                          max_terms: int = 3, seed: int = 0):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=sep, lineterminator="\n")
+        writer.writerow(sheet_header(langs, definitions))
+        writer.writerows(iter_sheet_rows(rows, langs, definitions, max_terms, seed=seed))
+
+def write_sheet_xlsx(path: str, rows: int, langs: int = 5, definitions: int = 2, max_terms: int = 3,
+                     seed: int = 0):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(sheet_header(langs, definitions))
+    for row in iter_sheet_rows(rows, langs, definitions, max_terms, seed=seed):
+        ws.append([value or None for value in row])
+    wb.save(path)
+
+def write_termcat(path: str, entries: int, langs: int = 5, definitions: int = 2, max_terms: int = 3,
+                  seed: int = 0):
+    # TERMCAT-style <diccionari> of <fitxa> elements
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<diccionari>\n')
+        for i in range(entries):
+            f.write(f' <fitxa num="{i}">\n  <denominacio llengua="cod">IATE-{i}</denominacio>\n')
+            for lang in LANGS[:langs]:
+                for term in make_terms(rng, lang, max_terms):
+                    f.write(f'  <denominacio llengua="{lang}" tipus="terme principal">{escape(term)}</denominacio>\n')
+            for lang in LANGS[:definitions]:
+                f.write(f'  <definicio llengua="{lang}">{lang} definition {make_word(rng)} {make_word(rng)}</definicio>\n')
+            f.write(f'  <areatematica>{rng.choice(SUBJECTS[:-1])}</areatematica>\n </fitxa>\n')
+        f.write("</diccionari>\n")
+
+def write_termbase(path: str, entries: int, langs: int = 5, definitions: int = 2, max_terms: int = 3,
+                   seed: int = 0):
+    # TBX as the converters write it, built from the same rows as the sheets
+    layout = classify_columns(sheet_header(langs, definitions))
+    write_tbx(path, (row_to_term_entry(row, layout)
+                     for row in iter_sheet_rows(entries, langs, definitions, max_terms, seed=seed)))
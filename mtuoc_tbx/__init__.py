@@ -0,0 +1,34 @@
+"""Core conversion library shared by the MTUOC-TBX command line and GUI tools."""
+
+from importlib import import_module
+
+# Public name -> submodule. Submodules (and lxml/pandas with them) are only
+# imported when one of their names is first used, so that importing the
+# package, or running a CLI with --help, stays fast.
+EXPORTS = {
+    "write_tbx": "writer",
+    "classify_columns": "tabular",
+    "row_to_term_entry": "tabular",
+    "csv_to_tbx": "tabular",
+    "tsv_to_tbx": "tabular",
+    "excel_to_tbx": "tabular",
+    "list_sheets": "tabular",
+    "flatten_term_entry": "reader",
+    "iter_entries": "reader",
+    "tbx_to_excel": "reader",
+    "Projection": "reader",
+    "fitxa_to_term_entry": "termcat",
+    "xml_to_tbx_extended": "termcat",
+    "TermStore": "model",
+    "validate_tbx": "validate",
+    "detect_dialect": "dialect",
+}
+
+__all__ = list(EXPORTS)
+
+def __getattr__(name):
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
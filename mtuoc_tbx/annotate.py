@@ -0,0 +1,238 @@
+import json
+import os
+from collections import defaultdict
+
+from .cells import VALUE_SEPARATOR, check_separator
+from .model import DESCRIP, LANG_SET, TermStore
+from .reader import iter_term_entry_elements
+
+def fold_case(text: str) -> str:
+    # Lower-case without changing the length, so that match offsets are
+    # valid in the original text.
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+class TermAutomaton:
+    # Aho-Corasick automaton over the terms of one language. Every term is a
+    # pattern; a pattern id points to the entries that contain the term.
+
+    def __init__(self, ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [-1]
+        self.dict_link = [0]
+        self.patterns = []
+        self.pattern_ids = {}
+        self.built = False
+
+    def add(self, term: str, value):
+        term = term.strip()
+        if not term:
+            return
+        if self.ignore_case:
+            term = fold_case(term)
+        pattern_id = self.pattern_ids.get(term)
+        if pattern_id is None:
+            pattern_id = self.pattern_ids[term] = len(self.patterns)
+            self.patterns.append((term, []))
+            node = 0
+            for c in term:
+                child = self.goto[node].get(c)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][c] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(-1)
+                    self.dict_link.append(0)
+                node = child
+            self.output[node] = pattern_id
+        values = self.patterns[pattern_id][1]
+        if not values or values[-1] != value:
+            values.append(value)
+        self.built = False
+
+    def build(self):
+        # Breadth-first computation of the failure links and of the dictionary
+        # suffix links (nearest shorter pattern ending at the same node).
+        goto, fail, output, dict_link = self.goto, self.fail, self.output, self.dict_link
+        queue = list(goto[0].values())
+        for node in queue:
+            fail[node] = 0
+            dict_link[node] = 0
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for c, child in goto[node].items():
+                state = fail[node]
+                while state and c not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(c, 0)
+                link = fail[child]
+                dict_link[child] = link if output[link] != -1 else dict_link[link]
+                queue.append(child)
+        self.built = True
+
+    def iter_matches(self, text: str):
+        # Yield (start, end, pattern_id) for every occurrence, overlapping ones
+        # included.
+        if not self.built:
+            self.build()
+        if self.ignore_case:
+            text = fold_case(text)
+        goto, fail, output, dict_link, patterns = self.goto, self.fail, self.output, self.dict_link, self.patterns
+        node = 0
+        for end, c in enumerate(text, 1):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            out = node if output[node] != -1 else dict_link[node]
+            while out:
+                pattern_id = output[out]
+                yield end - len(patterns[pattern_id][0]), end, pattern_id
+                out = dict_link[out]
+
+    def find(self, text: str, whole_words: bool = True, longest: bool = True) -> list:
+        matches = self.iter_matches(text)
+        if whole_words:
+            matches = (m for m in matches
+                       if (m[0] == 0 or not text[m[0] - 1].isalnum())
+                       and (m[1] == len(text) or not text[m[1]].isalnum()))
+        if not longest:
+            return list(matches)
+        # Leftmost-longest, non-overlapping selection
+        selected = []
+        last_end = 0
+        for start, end, pattern_id in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+            if start >= last_end:
+                selected.append((start, end, pattern_id))
+                last_end = end
+        return selected
+
+class Annotator:
+    # Source-language automaton plus the target-language equivalents of every
+    # entry, loaded from a TBX file written by the X2TBX converters.
+
+    def __init__(self, automaton: TermAutomaton, entries: TermStore, value_separator: str = VALUE_SEPARATOR):
+        # entries keeps the externalCrossReference descrips and the target
+        # langSets of every entry; several refs are joined on value_separator
+        self.automaton = automaton
+        self.entries = entries
+        self.value_separator = value_separator
+
+    def entry(self, entry_id: int) -> tuple:
+        refs = []
+        targets = {}
+        for kind, _, lang, texts in self.entries.iter_children(entry_id):
+            if kind == DESCRIP:
+                refs.extend(texts)
+            else:
+                targets[lang] = list(texts)
+        return self.value_separator.join(refs), targets
+
+    def annotate(self, sentence: str, whole_words: bool = True, longest: bool = True) -> list:
+        matches = []
+        for start, end, pattern_id in self.automaton.find(sentence, whole_words, longest):
+            for entry_id in self.automaton.patterns[pattern_id][1]:
+                ref, targets = self.entry(entry_id)
+                matches.append({
+                    "entry": entry_id,
+                    "ref": ref,
+                    "start": start,
+                    "end": end,
+                    "term": sentence[start:end],
+                    "targets": targets,
+                })
+        return matches
+
+def load_annotator(tbx_path: str, source_lang: str, target_langs: list = None, ignore_case: bool = False,
+                   value_separator: str = VALUE_SEPARATOR) -> Annotator:
+    # target_langs=None keeps every language other than the source one
+    check_separator(value_separator)
+    source_lang = source_lang.lower()
+    if target_langs is not None:
+        target_langs = [lang.lower() for lang in target_langs]
+    automaton = TermAutomaton(ignore_case)
+    entries = TermStore()
+    for entry_id, term_entry in enumerate(iter_term_entry_elements(tbx_path)):
+        refs = [d.text.strip() for d in term_entry.iterchildren("descrip")
+                if d.get("type") == "externalCrossReference" and d.text]
+        targets = defaultdict(list)
+        for lang_set in term_entry.iterchildren("langSet"):
+            lang = (lang_set.get("{http://www.w3.org/XML/1998/namespace}lang") or "").lower()
+            terms = [term.text.strip() for term in lang_set.iter("term") if term.text and term.text.strip()]
+            if lang == source_lang:
+                for term in terms:
+                    automaton.add(term, entry_id)
+            elif target_langs is None or lang in target_langs:
+                targets[lang].extend(terms)
+        for ref in refs:
+            entries.add_child(DESCRIP, "externalCrossReference", None, (ref,))
+        for lang, terms in targets.items():
+            entries.add_child(LANG_SET, None, lang, terms)
+        entries.end_entry()
+    automaton.build()
+    return Annotator(automaton, entries, value_separator)
+
+def annotate_lines(annotator: Annotator, lines, whole_words: bool = True, longest: bool = True):
+    # Yield one JSON line per input line that has at least one match
+    for number, line in enumerate(lines, 1):
+        sentence = line.rstrip("\r\n")
+        matches = annotator.annotate(sentence, whole_words, longest)
+        if matches:
+            yield json.dumps({"line": number, "matches": matches}, ensure_ascii=False) + "\n"
+
+_worker_annotator = None
+
+def _init_worker(annotator: Annotator):
+    global _worker_annotator
+    _worker_annotator = annotator
+
+def annotate_file(input_path: str, output_path: str, whole_words: bool = True, longest: bool = True,
+                  annotator: Annotator = None) -> int:
+    # Returns the number of sentences read
+    annotator = annotator or _worker_annotator
+    count = 0
+    with open(input_path, encoding="utf-8") as fin, open(output_path, "w", encoding="utf-8") as fout:
+        def counted(lines):
+            nonlocal count
+            for line in lines:
+                count += 1
+                yield line
+        fout.writelines(annotate_lines(annotator, counted(fin), whole_words, longest))
+    return count
+
+def output_names(input_paths: list) -> list:
+    # <name>.jsonl for every input file; inputs sharing a name (in different
+    # directories) get <name>.1.jsonl, <name>.2.jsonl... in the order given
+    names = []
+    seen = set()
+    for path in input_paths:
+        name = os.path.basename(path)
+        unique = name
+        suffix = 0
+        while unique in seen:
+            suffix += 1
+            unique = f"{name}.{suffix}"
+        seen.add(unique)
+        names.append(unique + ".jsonl")
+    return names
+
+def annotate_files(annotator: Annotator, input_paths: list, output_dir: str, workers: int = None,
+                   whole_words: bool = True, longest: bool = True) -> int:
+    # One output file per input file (see output_names). With workers, files
+    # are sharded over a process pool; the annotator is sent to each worker
+    # once.
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, os.path.join(output_dir, name), whole_words, longest)
+            for path, name in zip(input_paths, output_names(input_paths))]
+    if workers and workers > 1:
+        from multiprocessing import Pool
+
+        with Pool(workers, initializer=_init_worker, initargs=(annotator,)) as pool:
+            return sum(pool.starmap(annotate_file, jobs))
+    return sum(annotate_file(*job, annotator=annotator) for job in jobs)
@@ -0,0 +1,52 @@
+import sys
+from functools import lru_cache
+
+# Multi-valued cells: a tabular cell holds several terms or descrip values
+# joined by a separator ("term one; term two"). Glossaries repeat descrip
+# cells (subject fields, shared definitions) across thousands of rows, so
+# their splitting is memoized in a bounded LRU cache and repeated values are
+# shared instead of held once per row. Term cells are mostly distinct and
+# bypass the caches. Language codes and column names, which come from a
+# small set, are interned.
+
+VALUE_SEPARATOR = "; "
+# Distinct cells, values and column keys remembered by each cache
+CACHE_SIZE = 4096
+
+def check_separator(value_separator: str) -> str:
+    if not value_separator:
+        raise ValueError("The value separator cannot be empty.")
+    return value_separator
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_cell(value: str, value_separator: str = VALUE_SEPARATOR) -> tuple:
+    # The same tuple, holding the same strings, for every repeat of a cell
+    return tuple(value.split(value_separator))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def shared(text: str) -> str:
+    # The first equal string still in the cache, so that repeated values
+    # reference one object
+    return text
+
+@lru_cache(maxsize=CACHE_SIZE)
+def column_key(type_: str, lang: str) -> str:
+    # Flat column name of a descrip: its type, with the language when it has
+    # one (definition_en)
+    key = type_ if not lang else f"{type_}_{lang}"
+    return sys.intern(key) if key is not None else None
+
+def split_terms(value: str, value_separator: str = VALUE_SEPARATOR) -> list:
+    return value.split(value_separator)
+
+def join_cell(texts, value_separator: str = VALUE_SEPARATOR) -> str:
+    # Joined descrip values, shared with earlier equal cells
+    return shared(value_separator.join(texts))
+
+def join_terms(texts, value_separator: str = VALUE_SEPARATOR) -> str:
+    return value_separator.join(texts)
+
+def cache_info() -> dict:
+    # Hits and misses of every cache, e.g. to size CACHE_SIZE for a glossary
+    return {name: function.cache_info()._asdict()
+            for name, function in (("split_cell", split_cell), ("shared", shared), ("column_key", column_key))}
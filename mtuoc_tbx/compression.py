@@ -0,0 +1,46 @@
+import io
+import os
+
+# Transparent compression of input and output files, chosen by extension:
+# termbase.tbx.gz, termbase.tbx.xz, termbase.tbx.bz2 or termbase.tbx.zst.
+# zstd needs the zstandard package.
+
+EXTENSIONS = {".gz": "gzip", ".xz": "xz", ".bz2": "bz2", ".zst": "zstd"}
+# Compressed output is written in blocks of this size instead of one small
+# write per fragment
+WRITE_BUFFER = 1 << 20
+
+def compression_of(path: str) -> str:
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+def strip_compression(path: str) -> str:
+    # termbase.tbx.gz -> termbase.tbx
+    return os.path.splitext(path)[0] if compression_of(path) else path
+
+def open_file(path: str, mode: str = "rb"):
+    # Binary file object for mode "rb" or "wb"
+    kind = compression_of(path)
+    if kind is None:
+        return open(path, mode)
+    if kind == "gzip":
+        import gzip
+        f = gzip.open(path, mode)
+    elif kind == "xz":
+        import lzma
+        f = lzma.open(path, mode)
+    elif kind == "bz2":
+        import bz2
+        f = bz2.open(path, mode)
+    else:
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading or writing .zst files needs the zstandard package.") from None
+        if mode == "rb":
+            f = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+            return io.BufferedReader(f)
+        f = zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+    return io.BufferedWriter(f, WRITE_BUFFER) if mode == "wb" else f
+
+def open_text(path: str, mode: str = "r", encoding: str = "utf-8", newline: str = None):
+    return io.TextIOWrapper(open_file(path, mode[0] + "b"), encoding=encoding, newline=newline)
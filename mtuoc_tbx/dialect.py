@@ -0,0 +1,239 @@
+import hashlib
+import html
+import re
+from lxml import etree
+
+from .compression import open_file
+
+# Two TBX dialects are read and written:
+#
+#   legacy   <tbx><body><termEntry><langSet xml:lang><tig><term>, without a
+#            namespace, as the converters have always written it (TBX v2
+#            <martif> files read the same way)
+#   tbx3     TBX v3 / TBX-Basic: <tbx xmlns="urn:iso:std:iso:30042:ed-2">
+#            <text><body><conceptEntry id><langSec xml:lang><termSec><term>
+#
+# The rest of the library only knows legacy termEntry elements. A tbx3 file
+# is read through LegacyTranslator, which renames its structural tags and
+# drops the TBX namespace declaration on the raw bytes before they reach the
+# parser, so its entries are parsed directly as termEntry elements. Files
+# where the TBX elements carry a prefix (<tbx:conceptEntry>) are renamed
+# element by element after parsing instead (Dialect.to_legacy). Written
+# entries are turned into tbx3 by to_concept_entry before they are
+# serialized, and given unique ids by ConceptIds as they are written.
+
+TBX3_NAMESPACE = "urn:iso:std:iso:30042:ed-2"
+# tbx3 structural element -> legacy element
+TBX3_TAGS = {"conceptEntry": "termEntry", "langSec": "langSet", "termSec": "tig"}
+# The same renaming on serialized XML. Text and attribute values cannot
+# contain "<", and no other TBX element starts with these names, so only
+# these tags match.
+TBX3_FRAGMENT_TAGS = ((b"<termEntry", b"<conceptEntry"), (b"</termEntry", b"</conceptEntry"),
+                      (b"<langSet", b"<langSec"), (b"</langSet", b"</langSec"),
+                      (b"<tig", b"<termSec"), (b"</tig", b"</termSec"))
+# legacy element -> tbx3 structural element
+TBX3_LEGACY_TAGS = {legacy: tag for tag, legacy in TBX3_TAGS.items()}
+TBX3_ROOT = f'<tbx xmlns="{TBX3_NAMESPACE}" type="TBX-Basic" style="dca" xml:lang="en">'.encode()
+TBX3_HEADER = b"<tbxHeader><fileDesc><sourceDesc><p>MTUOC-TBX</p></sourceDesc></fileDesc></tbxHeader>"
+READ_BYTES = 1 << 16
+# Start-tag id and externalCrossReference of a serialized entry, and the
+# characters not allowed in an xs:ID (an XML NCName)
+ID_ATTRIBUTE = re.compile(rb'\sid="([^"]*)"')
+REF_DESCRIP = re.compile(rb'<descrip type="externalCrossReference">([^<]*)</descrip>')
+NON_ID_CHARACTERS = re.compile(r"[^\w.\-]")
+
+class LegacyTranslator:
+    # Incremental tbx3 -> legacy rewriting of a byte stream. The bytes from
+    # the last "<" of every chunk on are held back until the next one, so a
+    # tag is never split between two chunks.
+    __slots__ = ("replacements", "declarations", "pending")
+
+    def __init__(self, namespace: str = None):
+        self.replacements = tuple((tbx3, legacy) for legacy, tbx3 in TBX3_FRAGMENT_TAGS)
+        # Looked for until the first one is dropped, normally from the root
+        self.declarations = (f' xmlns="{namespace}"'.encode(), f" xmlns='{namespace}'".encode()) if namespace else ()
+        self.pending = b""
+
+    def translate(self, data: bytes) -> bytes:
+        for old, new in self.replacements:
+            data = data.replace(old, new)
+        for declaration in self.declarations:
+            if declaration in data:
+                data = data.replace(declaration, b"")
+                self.declarations = ()
+        return data
+
+    def feed(self, data: bytes) -> bytes:
+        data = self.pending + data
+        cut = data.rfind(b"<")
+        if cut <= 0:
+            self.pending = data
+            return b""
+        self.pending = data[cut:]
+        return self.translate(data[:cut])
+
+    def close(self) -> bytes:
+        data, self.pending = self.pending, b""
+        return self.translate(data)
+
+class LegacyReader:
+    # Binary file object reading a tbx3 file as legacy TBX
+    def __init__(self, f, namespace: str = None):
+        self.f = f
+        self.translator = LegacyTranslator(namespace)
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            data = self.f.read(size if size and size > 0 else READ_BYTES)
+            if not data:
+                return self.translator.close()
+            data = self.translator.feed(data)
+            if data:
+                return data
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Dialect:
+    # name is "legacy" or "tbx3"; namespace is the one of the entries in the
+    # file being read, and prefixed tells whether they carry a prefix. Only
+    # files with unprefixed entries can be translated as bytes, or split
+    # into shards that are parsed without the root (see reader.find_shards).
+    __slots__ = ("name", "namespace", "prefixed", "entry_name", "entry_tag", "legacy_tags")
+
+    def __init__(self, name: str, namespace: str = None, prefixed: bool = False):
+        self.name = name
+        self.namespace = namespace
+        self.prefixed = prefixed
+        # Name of the entries in the file, and tag of the entries once read
+        # (see open()); both are built once here rather than on every lookup
+        self.entry_name = "conceptEntry" if name == "tbx3" else "termEntry"
+        if self.translated:
+            self.entry_tag = "termEntry"
+        else:
+            self.entry_tag = f"{{{namespace}}}{self.entry_name}" if namespace else self.entry_name
+        self.legacy_tags = {}
+        for tag, legacy in TBX3_TAGS.items() if name == "tbx3" else ():
+            self.legacy_tags[tag] = legacy
+            if namespace:
+                self.legacy_tags[f"{{{namespace}}}{tag}"] = legacy
+
+    @property
+    def shardable(self) -> bool:
+        return not self.prefixed
+
+    @property
+    def translated(self) -> bool:
+        return self.name == "tbx3" and not self.prefixed
+
+    @property
+    def renames(self) -> bool:
+        # Entries that still need to_legacy() once parsed
+        return not self.translated and (self.name == "tbx3" or bool(self.namespace))
+
+    def open(self, input_path: str):
+        f = open_file(input_path)
+        return LegacyReader(f, self.namespace) if self.translated else f
+
+    def translator(self) -> LegacyTranslator:
+        return LegacyTranslator(self.namespace) if self.translated else None
+
+    def to_legacy(self, element):
+        # Rename a parsed entry in place: structural tbx3 elements to their
+        # legacy names, every other element to its local name. The entry is
+        # then detached from its parent, as lxml would otherwise serialize it
+        # with the namespace declarations of its ancestors.
+        tags = self.legacy_tags
+        for child in element.iter(tag=etree.Element):
+            tag = child.tag
+            legacy = tags.get(tag)
+            if legacy is None:
+                legacy = tags[tag] = tag.rpartition("}")[2]
+            if legacy != tag:
+                child.tag = legacy
+        parent = element.getparent()
+        if parent is not None:
+            parent.remove(element)
+        etree.cleanup_namespaces(element)
+        return element
+
+DIALECTS = {"legacy": Dialect("legacy"), "tbx3": Dialect("tbx3", TBX3_NAMESPACE)}
+
+def get_dialect(dialect) -> Dialect:
+    # A Dialect, or the name of one
+    if isinstance(dialect, Dialect):
+        return dialect
+    if dialect not in DIALECTS:
+        raise ValueError(f"Unknown TBX dialect '{dialect}'. Use 'legacy' or 'tbx3'.")
+    return DIALECTS[dialect]
+
+def detect_dialect(input_path: str) -> Dialect:
+    # Dialect and namespace of the first entry; parsing stops there
+    with open_file(input_path) as f:
+        for _, element in etree.iterparse(f, events=("start",)):
+            qname = etree.QName(element)
+            if qname.localname in ("termEntry", "conceptEntry"):
+                return Dialect("tbx3" if qname.localname == "conceptEntry" else "legacy", qname.namespace,
+                               element.prefix is not None)
+    return DIALECTS["legacy"]
+
+def to_concept_entry(term_entry) -> bool:
+    # Turn a legacy termEntry into a tbx3 conceptEntry in place. TBX v3 wants
+    # the concept-level descrips before the langSecs, so the ones after a
+    # langSet (written in column order) are moved up. It also wants at least
+    # one langSec: an entry without terms is left as it is and gives False.
+    if not any(term.text and term.text.strip() for term in term_entry.iter("term")):
+        return False
+    first_lang_set = None
+    for child in list(term_entry):
+        if child.tag == "langSet":
+            if first_lang_set is None:
+                first_lang_set = child
+        elif first_lang_set is not None:
+            first_lang_set.addprevious(child)
+    for element in term_entry.iter(tag=etree.Element):
+        tag = TBX3_LEGACY_TAGS.get(element.tag)
+        if tag is not None:
+            element.tag = tag
+    return True
+
+class ConceptIds:
+    # Ids of the conceptEntry fragments written to one file. An entry keeps
+    # its id; the others get one from their externalCrossReference, or else
+    # from a hash of their content. Repeated ids get a ".1", ".2"... suffix,
+    # so ids are unique in the file (xs:ID) and the same in every run.
+    __slots__ = ("ids",)
+
+    def __init__(self):
+        self.ids = set()
+
+    def base_id(self, fragment: bytes) -> str:
+        match = REF_DESCRIP.search(fragment)
+        ref = html.unescape(match.group(1).decode("utf-8")).strip() if match else ""
+        if not ref:
+            return "c" + hashlib.blake2b(fragment, digest_size=8).hexdigest()
+        ref = NON_ID_CHARACTERS.sub("_", ref)
+        return ref if ref[0].isalpha() or ref[0] == "_" else "c" + ref
+
+    def assign(self, fragment: bytes) -> bytes:
+        # fragment is a serialized conceptEntry
+        start = fragment[:fragment.find(b">")]
+        match = ID_ATTRIBUTE.search(start)
+        entry_id = match.group(1).decode("utf-8") if match else self.base_id(fragment)
+        unique = entry_id
+        suffix = 0
+        while unique in self.ids:
+            suffix += 1
+            unique = f"{entry_id}.{suffix}"
+        self.ids.add(unique)
+        if match is None:
+            return b'<conceptEntry id="' + unique.encode("utf-8") + b'"' + fragment[len(b"<conceptEntry"):]
+        if unique != entry_id:
+            return fragment[:match.start(1)] + unique.encode("utf-8") + fragment[match.end(1):]
+        return fragment
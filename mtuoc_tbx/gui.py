@@ -0,0 +1,94 @@
+import os
+import threading
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from .progress import ConversionCancelled, Progress
+
+POLL_MS = 200
+
+def file_stamp(path: str) -> tuple:
+    # (size, mtime) of an existing file, else None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+class ConversionRunner:
+    # Runs a conversion on a worker thread so that the window stays
+    # responsive, and shows its progress in a row of the window: an activity
+    # bar, a status line and a Cancel button. Tk is only touched from the
+    # main thread, which polls the shared Progress object.
+
+    def __init__(self, root, row: int, convert_button):
+        self.root = root
+        self.convert_button = convert_button
+        self.bar = ttk.Progressbar(root, mode="indeterminate", length=300)
+        self.bar.grid(row=row, column=0, columnspan=2, padx=10, pady=5, sticky="we")
+        self.cancel_button = tk.Button(root, text="Cancel", command=self.cancel, state="disabled")
+        self.cancel_button.grid(row=row, column=2, padx=5, pady=5)
+        self.status = tk.Label(root, text="")
+        self.status.grid(row=row + 1, column=0, columnspan=3, padx=10, pady=(0, 10))
+        self.progress = None
+        self.thread = None
+
+    def start(self, convert, args: tuple, output_path: str, success_message: str, error_title: str):
+        # convert(*args, progress=...) runs on the worker thread
+        self.progress = Progress()
+        self.output_path = output_path
+        # A cancelled run only removes the output if it wrote to it
+        self.output_stamp = file_stamp(output_path)
+        self.success_message = success_message
+        self.error_title = error_title
+        self.outcome = None
+        self.thread = threading.Thread(target=self.run, args=(convert, args), daemon=True)
+        self.convert_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.status.config(text="Converting...")
+        self.bar.start(10)
+        self.thread.start()
+        self.root.after(POLL_MS, self.poll)
+
+    def run(self, convert, args: tuple):
+        try:
+            convert(*args, progress=self.progress)
+            self.outcome = ("ok", None)
+        except ConversionCancelled:
+            self.outcome = ("cancelled", None)
+        except Exception as e:
+            self.outcome = ("error", e)
+        finally:
+            self.progress.finish()
+
+    def cancel(self):
+        if self.progress is not None:
+            self.progress.cancel()
+            self.cancel_button.config(state="disabled")
+            self.status.config(text="Cancelling...")
+
+    def poll(self):
+        progress = self.progress
+        if self.thread.is_alive():
+            if not progress.cancelled:
+                self.status.config(text=f"{progress.entries:,} entries  {progress.rate:,.0f} entries/s  {progress.elapsed:.0f} s")
+            self.root.after(POLL_MS, self.poll)
+            return
+
+        self.bar.stop()
+        self.convert_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        result, error = self.outcome
+        if result == "ok":
+            self.status.config(text=f"{progress.entries:,} entries in {progress.elapsed:.1f} s")
+            messagebox.showinfo("Success", self.success_message)
+        elif result == "cancelled":
+            # Do not leave a truncated output behind, but keep a file the run
+            # never opened (e.g. .xlsx outputs are only written at the end)
+            stamp = file_stamp(self.output_path)
+            if stamp is not None and stamp != self.output_stamp:
+                os.remove(self.output_path)
+            self.status.config(text="Conversion cancelled.")
+        else:
+            self.status.config(text="")
+            messagebox.showerror(self.error_title, str(error))
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import mmap
+import os
+
+from .cells import VALUE_SEPARATOR
+from .compression import compression_of
+from .tabular import iter_layouts, row_to_term_entry
+from .writer import serialize_term_entry, write_tbx_fragments
+
+# The manifest is a JSON sidecar next to the output:
+#
+#   {"key_column": "externalCrossReference", "compact": false, "value_separator": "; ",
+#    "dialect": "legacy", "output": [<size>, <mtime_ns>],
+#    "rows": {"<key>": ["<row hash>", <fragment offset>, <fragment length>]}}
+#
+# The offsets point into the TBX file written by the previous run, whose
+# fragments are copied as they are for the rows whose hash did not change.
+# output records the size and modification time of that file, so that a
+# manifest is not trusted once the file has been rewritten by other means.
+
+MANIFEST_SUFFIX = ".manifest.json"
+# A reused fragment must start with one of these
+ENTRY_STARTS = (b"<termEntry", b"<conceptEntry")
+
+def output_stamp(output_path: str) -> list:
+    stat = os.stat(output_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def row_hash(columns: tuple, values: tuple) -> str:
+    # The columns are part of the hash, so a changed header re-serializes
+    # every row.
+    data = "\x1f".join(columns) + "\x1e" + "\x1f".join(str(value) for value in values)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+def load_manifest(manifest_path: str, output_path: str, key_column: str, compact: bool = False,
+                  value_separator: str = VALUE_SEPARATOR, dialect: str = "legacy") -> dict:
+    if not (os.path.exists(manifest_path) and os.path.exists(output_path)):
+        return {}
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    # Fragments of the other layout or dialect, or split on another separator,
+    # cannot be reused
+    if (manifest.get("key_column") != key_column or manifest.get("compact", False) != compact
+            or manifest.get("value_separator", VALUE_SEPARATOR) != value_separator
+            or manifest.get("dialect", "legacy") != dialect):
+        return {}
+    # Nor can those of an output written since, e.g. by a full rebuild
+    if manifest.get("output") != output_stamp(output_path):
+        return {}
+    return manifest["rows"]
+
+def iter_incremental_fragments(blocks, key_column: str, old_rows: dict, old_mm, new_rows: dict, stats: dict,
+                               compact: bool = False, value_separator: str = VALUE_SEPARATOR,
+                               dialect: str = "legacy"):
+    # new_rows collects key -> [hash, index of the fragment]; the index is
+    # turned into an offset once the output has been written.
+    index = 0
+    for layout, columns, rows in iter_layouts(blocks):
+        key_index = columns.index(key_column) if key_column in columns else None
+        for values in rows:
+            key = values[key_index] if key_index is not None else ""
+            digest = row_hash(columns, values)
+            old = old_rows.get(key) if key and key not in new_rows else None
+            fragment = None
+            if old is not None and old[0] == digest and old_mm is not None:
+                fragment = old_mm[old[1]:old[1] + old[2]]
+                if not fragment.startswith(ENTRY_STARTS):
+                    fragment = None
+            if fragment is None:
+                fragment = serialize_term_entry(row_to_term_entry(values, layout, value_separator), compact, dialect)
+                stats["converted"] += 1
+            else:
+                stats["reused"] += 1
+            if key and key not in new_rows:
+                new_rows[key] = [digest, index]
+            index += 1
+            yield fragment
+
+def incremental_blocks_to_tbx(blocks, output_path: str, key_column: str = "externalCrossReference",
+                              manifest_path: str = None, progress=None, compact: bool = False,
+                              value_separator: str = VALUE_SEPARATOR, dialect: str = "legacy") -> dict:
+    # Rebuild output_path re-serializing only the rows that are new or whose
+    # content changed since the previous run. Rows without a key, and repeated
+    # keys after the first one, are always converted. Returns counts of
+    # reused, converted and deleted rows.
+    if compression_of(output_path):
+        raise ValueError("Incremental rebuilds need an uncompressed output file.")
+    manifest_path = manifest_path or output_path + MANIFEST_SUFFIX
+    old_rows = load_manifest(manifest_path, output_path, key_column, compact, value_separator, dialect)
+    new_rows = {}
+    offsets = []
+    stats = {"reused": 0, "converted": 0, "deleted": 0}
+    tmp_path = output_path + ".tmp"
+
+    def write(old_rows, old_mm):
+        fragments = iter_incremental_fragments(blocks, key_column, old_rows, old_mm, new_rows, stats, compact,
+                                               value_separator, dialect)
+        if progress is None:
+            write_tbx_fragments(tmp_path, fragments, offsets, compact, dialect)
+        else:
+            with progress.stage("write"):
+                write_tbx_fragments(tmp_path, progress.timed(fragments, "convert", count=True), offsets, compact,
+                                    dialect)
+
+    if old_rows and os.path.getsize(output_path):
+        with open(output_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as old_mm:
+            write(old_rows, old_mm)
+    else:
+        write({}, None)
+    os.replace(tmp_path, output_path)
+
+    stats["deleted"] = sum(1 for key in old_rows if key not in new_rows)
+    for row in new_rows.values():
+        row.extend(offsets[row.pop()])
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"key_column": key_column, "compact": compact, "value_separator": value_separator,
+                   "dialect": dialect, "output": output_stamp(output_path), "rows": new_rows}, f, ensure_ascii=False)
+    return stats
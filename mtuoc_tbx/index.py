@@ -0,0 +1,437 @@
+import hashlib
+import json
+import mmap
+import struct
+import sys
+import unicodedata
+from array import array
+from bisect import insort
+from collections import Counter, defaultdict
+from lxml import etree
+
+from .reader import flatten_term_entry
+from .writer import serialize_term_entry
+
+# Layout of an index file (all integers little-endian):
+#
+#   payloads   serialized termEntry elements, back to back
+#   entries    one ENTRY record (payload offset, payload length) per entry
+#   keys       UTF-8 normalized terms, back to back
+#   postings   uint32 entry ids, grouped by key
+#   tables     one open-addressing hash table of SLOT records per language
+#              and normalization mode
+#   vocab      per language, one VOCAB record per folded key (the fuzzy
+#              vocabulary), sorted by length
+#   grams      uint32 vocabulary ids, grouped by character n-gram, then one
+#              open-addressing hash table of GRAM records per language
+#   directory  JSON with the section offsets and the table of every language
+#   footer     directory offset (uint64) followed by MAGIC
+#
+# A lookup hashes the normalized term, probes the table and reads the
+# postings and payloads straight from the memory map. A fuzzy lookup counts
+# the n-grams the query shares with the folded keys of similar length, and
+# compares the keys that share the most with the query by edit distance.
+
+MAGIC = b"MTBXIDX1"
+FOOTER = struct.Struct("<Q8s")
+ENTRY = struct.Struct("<QI")
+# hash, key offset, key length, postings offset, postings count
+SLOT = struct.Struct("<QQIII")
+POSTING = struct.Struct("<I")
+# key offset, key length, postings offset, postings count
+VOCAB = struct.Struct("<QIII")
+# hash, gram postings offset, gram postings count
+GRAM = struct.Struct("<QII")
+MODES = ("exact", "folded")
+MAX_LOAD = 0.7
+NGRAM = 3
+# Without max_distance, fuzzy lookups stop at keys this similar
+MIN_SIMILARITY = 0.75
+# Keys compared with the query per fuzzy lookup
+MAX_CANDIDATES = 1000
+# Share of the keys of a length band above which an n-gram is not counted
+COMMON_GRAM = 0.05
+
+def normalize(term: str, fold: bool = False) -> str:
+    # exact: whitespace-trimmed NFC; folded: also case-folded and without
+    # diacritics.
+    term = unicodedata.normalize("NFC", term.strip())
+    if fold:
+        term = "".join(c for c in unicodedata.normalize("NFKD", term.casefold()) if not unicodedata.combining(c))
+    return term
+
+def key_hash(key: bytes) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+def ngrams(key: str) -> set:
+    # Character n-grams of a folded key, padded so that the first and last
+    # characters get n-grams of their own
+    key = " " * (NGRAM - 1) + key + " "
+    return {key[i:i + NGRAM] for i in range(len(key) - NGRAM + 1)}
+
+def char_masks(pattern: str) -> dict:
+    # Bit i of masks[c] is set where pattern[i] == c
+    masks = {}
+    for i, c in enumerate(pattern):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks
+
+def masked_distance(masks: dict, length: int, text: str) -> int:
+    # Levenshtein distance between the pattern of masks, of the given length,
+    # and text, with Myers' bit-parallel algorithm: one step of integer
+    # operations per character of text instead of one per pair of characters.
+    if not length:
+        return len(text)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv, mv, score = full, 0, length
+    for c in text:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+    return score
+
+def edit_distance(a: str, b: str) -> int:
+    return masked_distance(char_masks(a), len(a), b)
+
+def similarity(a: str, b: str, distance: int) -> float:
+    return 1.0 - distance / max(len(a), len(b), 1)
+
+def entry_terms(term_entry):
+    for lang_set in term_entry.iterchildren("langSet"):
+        lang = lang_set.get("{http://www.w3.org/XML/1998/namespace}lang")
+        if not lang:
+            continue
+        for term in lang_set.iter("term"):
+            if term.text and term.text.strip():
+                yield lang.lower(), term.text
+
+def hash_table(records: list, record: struct.Struct) -> bytes:
+    # records are (hash, *fields) tuples. Power-of-two capacity with a load
+    # factor of at most MAX_LOAD; an empty slot is all zeros.
+    capacity = 1
+    while capacity * MAX_LOAD < len(records):
+        capacity *= 2
+    slots = [None] * capacity
+    for fields in records:
+        pos = fields[0] & (capacity - 1)
+        while slots[pos] is not None:
+            pos = (pos + 1) & (capacity - 1)
+        slots[pos] = record.pack(*fields)
+    empty = bytes(record.size)
+    return b"".join(slot or empty for slot in slots)
+
+def build_table(keys: dict, key_offsets: dict, postings_offsets: dict) -> bytes:
+    return hash_table([(key_hash(key), key_offsets[key], len(key), postings_offsets[key], len(entry_ids))
+                       for key, entry_ids in keys.items()], SLOT)
+
+def build_index(term_entries, output_path: str, fuzzy: bool = True) -> int:
+    # term_entries is an iterable of termEntry elements. Payloads are written
+    # as they arrive; only the keys and the entry ids stay in memory. Without
+    # fuzzy, the n-gram sections are left out and only exact and folded
+    # lookups are possible.
+    keys = {}
+    entries = []
+    with open(output_path, "wb") as f:
+        for entry_id, term_entry in enumerate(term_entries):
+            payload = serialize_term_entry(term_entry, compact=True)
+            entries.append(ENTRY.pack(f.tell(), len(payload)))
+            f.write(payload)
+            for lang, term in entry_terms(term_entry):
+                for mode in MODES:
+                    key = normalize(term, mode == "folded").encode("utf-8")
+                    ids = keys.setdefault((lang, mode), defaultdict(list))[key]
+                    if not ids or ids[-1] != entry_id:
+                        ids.append(entry_id)
+
+        directory = {"entries": f.tell(), "count": len(entries), "tables": {}}
+        f.write(b"".join(entries))
+
+        directory["keys"] = f.tell()
+        key_offsets = {}
+        for table_keys in keys.values():
+            for key in table_keys:
+                if key not in key_offsets:
+                    key_offsets[key] = f.tell() - directory["keys"]
+                    f.write(key)
+
+        directory["postings"] = f.tell()
+        postings_offsets = {}
+        for (lang, mode), table_keys in keys.items():
+            offsets = postings_offsets[lang, mode] = {}
+            for key, entry_ids in table_keys.items():
+                offsets[key] = (f.tell() - directory["postings"]) // POSTING.size
+                f.write(b"".join(POSTING.pack(entry_id) for entry_id in entry_ids))
+
+        for (lang, mode), table_keys in keys.items():
+            table = build_table(table_keys, key_offsets, postings_offsets[lang, mode])
+            directory["tables"].setdefault(lang, {})[mode] = {"offset": f.tell(), "capacity": len(table) // SLOT.size}
+            f.write(table)
+
+        if fuzzy:
+            write_fuzzy(f, directory, keys, key_offsets, postings_offsets)
+
+        directory_offset = f.tell()
+        f.write(json.dumps(directory).encode("utf-8"))
+        f.write(FOOTER.pack(directory_offset, MAGIC))
+    return len(entries)
+
+def write_fuzzy(f, directory: dict, keys: dict, key_offsets: dict, postings_offsets: dict):
+    # The vocabulary of a language is its folded keys sorted by length, so
+    # that the n-gram postings (vocabulary ids in ascending order) are sorted
+    # by key length too and a query only reads the lengths it can match.
+    # lengths[n] is the first vocabulary id of a key of at least n characters.
+    directory["ngram"] = NGRAM
+    directory["fuzzy"] = {}
+    vocabularies = {}
+    for (lang, mode), table_keys in keys.items():
+        if mode != "folded":
+            continue
+        vocabulary = vocabularies[lang] = sorted((key.decode("utf-8"), key) for key in table_keys)
+        vocabulary.sort(key=lambda item: len(item[0]))
+        offsets = postings_offsets[lang, "folded"]
+        lengths = []
+        for vocab_id, (text, _) in enumerate(vocabulary):
+            while len(lengths) <= len(text):
+                lengths.append(vocab_id)
+        lengths.append(len(vocabulary))
+        directory["fuzzy"][lang] = {"vocab": f.tell(), "size": len(vocabulary), "lengths": lengths}
+        f.write(b"".join(VOCAB.pack(key_offsets[key], len(key), offsets[key], len(table_keys[key]))
+                         for _, key in vocabulary))
+
+    directory["grams"] = f.tell()
+    gram_records = {}
+    for lang, vocabulary in vocabularies.items():
+        grams = defaultdict(lambda: array("I"))
+        for vocab_id, (text, _) in enumerate(vocabulary):
+            for gram in ngrams(text):
+                grams[gram].append(vocab_id)
+        records = gram_records[lang] = []
+        for gram, vocab_ids in grams.items():
+            records.append((key_hash(gram.encode("utf-8")), (f.tell() - directory["grams"]) // POSTING.size, len(vocab_ids)))
+            if sys.byteorder == "big":
+                vocab_ids.byteswap()
+            f.write(vocab_ids.tobytes())
+
+    for lang, records in gram_records.items():
+        table = hash_table(records, GRAM)
+        directory["fuzzy"][lang].update({"offset": f.tell(), "capacity": len(table) // GRAM.size})
+        f.write(table)
+
+class TermIndex:
+    # Read side of an index file built by build_index(). The file is memory
+    # mapped; only the JSON directory is decoded when it is opened.
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        directory_offset, magic = FOOTER.unpack_from(self._mm, len(self._mm) - FOOTER.size)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a termbase index file.")
+        self.directory = json.loads(self._mm[directory_offset:len(self._mm) - FOOTER.size])
+        self._entries = self.directory["entries"]
+        self._keys = self.directory["keys"]
+        self._postings = self.directory["postings"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.directory["count"]
+
+    @property
+    def languages(self) -> list:
+        return sorted(self.directory["tables"])
+
+    def lookup(self, term: str, lang: str, fold: bool = False) -> list:
+        # Ids of the entries that have term in language lang
+        table = self.directory["tables"].get(lang.lower(), {}).get("folded" if fold else "exact")
+        if table is None:
+            return []
+        key = normalize(term, fold).encode("utf-8")
+        h = key_hash(key)
+        mask = table["capacity"] - 1
+        pos = h & mask
+        mm = self._mm
+        while True:
+            slot_hash, key_offset, key_length, postings_offset, count = SLOT.unpack_from(mm, table["offset"] + pos * SLOT.size)
+            if count == 0:
+                return []
+            if slot_hash == h and key_length == len(key):
+                start = self._keys + key_offset
+                if mm[start:start + key_length] == key:
+                    start = self._postings + postings_offset * POSTING.size
+                    return list(struct.unpack_from(f"<{count}I", mm, start))
+            pos = (pos + 1) & mask
+
+    def gram_postings(self, table: dict, gram: str, first: int, last: int) -> tuple:
+        # (offset, count) of the vocabulary ids between first and last
+        # (exclusive) of the keys of a language that contain gram
+        h = key_hash(gram.encode("utf-8"))
+        mask = table["capacity"] - 1
+        pos = h & mask
+        mm = self._mm
+        while True:
+            slot_hash, postings_offset, count = GRAM.unpack_from(mm, table["offset"] + pos * GRAM.size)
+            if count == 0:
+                return 0, 0
+            if slot_hash == h:
+                break
+            pos = (pos + 1) & mask
+        start = self.directory["grams"] + postings_offset * POSTING.size
+        bounds = []
+        for bound in (first, last):
+            # Binary search in the memory map, without reading the postings
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if POSTING.unpack_from(mm, start + mid * POSTING.size)[0] < bound:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            bounds.append(lo)
+        return start + bounds[0] * POSTING.size, bounds[1] - bounds[0]
+
+    def vocab_key(self, table: dict, vocab_id: int) -> str:
+        key_offset, key_length = VOCAB.unpack_from(self._mm, table["vocab"] + vocab_id * VOCAB.size)[:2]
+        start = self._keys + key_offset
+        return self._mm[start:start + key_length].decode("utf-8")
+
+    def vocab_entries(self, table: dict, vocab_id: int) -> list:
+        postings_offset, count = VOCAB.unpack_from(self._mm, table["vocab"] + vocab_id * VOCAB.size)[2:]
+        return list(struct.unpack_from(f"<{count}I", self._mm, self._postings + postings_offset * POSTING.size))
+
+    def nearest(self, table: dict, key: str, limit: int, max_distance: int, max_candidates: int,
+                distances: dict) -> list:
+        # (distance, vocabulary id) of the keys within max_distance of key,
+        # sorted by distance: at least the limit closest ones (and all keys as
+        # close as the last of them), where there are that many. With
+        # max_candidates, at most that many keys are compared with key.
+        # distances caches the distance of every key compared so far.
+        lengths = table["lengths"]
+        first = lengths[min(max(len(key) - max_distance, 0), len(lengths) - 1)]
+        last = lengths[min(len(key) + max_distance + 1, len(lengths) - 1)]
+        grams = ngrams(key)
+        masks = char_masks(key)
+        # An edit changes at most NGRAM n-grams, so a key within max_distance
+        # shares at least least of them. Very short keys can match keys that
+        # share none; they are compared with every key of a suitable length.
+        least = len(grams) - NGRAM * max_distance
+        if least > 0:
+            postings = sorted((self.gram_postings(table, gram, first, last) for gram in grams), key=lambda p: p[1])
+            # n-grams that most keys of these lengths contain cost more to
+            # count than the candidates they rule out: they are left out and
+            # counted as shared by every key.
+            skipped = 0
+            while least - skipped > 1 and postings[-1][1] > (last - first) * COMMON_GRAM:
+                postings.pop()
+                skipped += 1
+            shared = Counter()
+            for offset, count in postings:
+                shared.update(struct.unpack_from(f"<{count}I", self._mm, offset))
+            # Keys that share more n-grams are compared first
+            ranked = sorted(shared, key=shared.__getitem__, reverse=True)
+        else:
+            shared = None
+            ranked = range(first, last)
+        matches = []
+        for compared, vocab_id in enumerate(ranked):
+            if shared is not None:
+                count = shared[vocab_id] + skipped
+                if count < least:
+                    break
+                # A key that shares count n-grams is at least this many edits
+                # away: once that is more than the distance of the limit-th
+                # match, no key left can be closer
+                if len(matches) >= limit and -(-(len(grams) - count) // NGRAM) > matches[limit - 1][0]:
+                    break
+            if max_candidates is not None and compared >= max_candidates:
+                break
+            d = distances.get(vocab_id)
+            if d is None:
+                d = distances[vocab_id] = masked_distance(masks, len(key), self.vocab_key(table, vocab_id))
+            if d <= max_distance:
+                insort(matches, (d, vocab_id))
+        return matches
+
+    def fuzzy(self, term: str, lang: str, limit: int = 10, max_distance: int = None,
+              max_candidates: int = MAX_CANDIDATES) -> list:
+        # Up to limit (distance, similarity, folded key, entry ids) tuples for
+        # the keys of language lang closest to term by edit distance, best
+        # first. Similarity is 1 - distance / length of the longer key.
+        # max_distance defaults to the distance of a MIN_SIMILARITY match.
+        # Only the max_candidates keys that share the most n-grams with term
+        # are compared with it; with None, the search is exhaustive.
+        if "fuzzy" not in self.directory:
+            raise ValueError("This index was built without fuzzy lookup; rebuild it with TBX2Index.")
+        table = self.directory["fuzzy"].get(lang.lower())
+        if table is None:
+            return []
+        key = normalize(term, fold=True)
+        if max_distance is None:
+            max_distance = int(len(key) * (1 - MIN_SIMILARITY))
+        # Close matches are found in a narrow length band with a strict
+        # n-gram threshold; the search is only widened to max_distance when
+        # there are fewer than limit of them.
+        distances = {}
+        matches = self.nearest(table, key, limit, min(1, max_distance), max_candidates, distances)
+        if len(matches) < limit and max_distance > 1:
+            matches = self.nearest(table, key, limit, max_distance, max_candidates, distances)
+        results = []
+        for d, vocab_id in matches:
+            candidate = self.vocab_key(table, vocab_id)
+            results.append((d, similarity(key, candidate, d), candidate, vocab_id))
+        results.sort(key=lambda result: (result[0], -result[1], result[2]))
+        return [(d, score, candidate, self.vocab_entries(table, vocab_id)) for d, score, candidate, vocab_id in results[:limit]]
+
+    def fuzzy_many(self, terms, lang: str, limit: int = 10, max_distance: int = None,
+                   max_candidates: int = MAX_CANDIDATES, workers: int = None) -> list:
+        # fuzzy() for a batch of terms, over workers processes when given
+        terms = list(terms)
+        if not workers or workers < 2 or len(terms) < 2:
+            return [self.fuzzy(term, lang, limit, max_distance, max_candidates) for term in terms]
+        from multiprocessing import Pool
+
+        chunksize = max(1, len(terms) // (workers * 4))
+        with Pool(workers, initializer=_init_worker, initargs=(self.path,)) as pool:
+            return pool.map(_fuzzy_in_worker, [(term, lang, limit, max_distance, max_candidates) for term in terms], chunksize)
+
+    def payload(self, entry_id: int) -> bytes:
+        offset, length = ENTRY.unpack_from(self._mm, self._entries + entry_id * ENTRY.size)
+        return self._mm[offset:offset + length]
+
+    def entry(self, entry_id: int) -> dict:
+        # Flat record, with the same keys TBX2Excel writes as columns
+        return flatten_term_entry(etree.fromstring(self.payload(entry_id)))
+
+    def search(self, term: str, lang: str, fold: bool = False) -> list:
+        return [self.entry(entry_id) for entry_id in self.lookup(term, lang, fold)]
+
+_worker_index = None
+
+def _init_worker(path: str):
+    global _worker_index
+    _worker_index = TermIndex(path)
+
+def _fuzzy_in_worker(query: tuple) -> list:
+    return _worker_index.fuzzy(*query)
@@ -0,0 +1,161 @@
+import hashlib
+import heapq
+import os
+import struct
+import tempfile
+from lxml import etree
+
+from .index import normalize
+from .reader import iter_term_entry_elements
+from .writer import serialize_term_entry, write_tbx_fragments
+
+# Merging runs in three passes so that memory is bounded by the size of one
+# partition instead of the size of the inputs:
+#
+#   1. every termEntry of every input is serialized into one of N partition
+#      files, chosen by the hash of its dedup key;
+#   2. each partition is loaded on its own, entries with the same key are
+#      merged and the result is written as a run sorted by first appearance;
+#   3. the sorted runs are k-way merged into the output, which keeps the
+#      order in which the entries first appeared in the inputs.
+
+# sequence number, key length, fragment length
+RECORD = struct.Struct("<QII")
+DEFAULT_PARTITIONS = 64
+
+def entry_key(term_entry, by: str, lang: str = None) -> str:
+    # by="ref": first externalCrossReference; by="term": normalized first term
+    # in lang. Returns "" when the entry has no key.
+    if by == "ref":
+        for descrip in term_entry.iterchildren("descrip"):
+            if descrip.get("type") == "externalCrossReference" and descrip.text and descrip.text.strip():
+                return "ref:" + descrip.text.strip()
+    elif by == "term":
+        for lang_set in term_entry.iterchildren("langSet"):
+            if (lang_set.get("{http://www.w3.org/XML/1998/namespace}lang") or "").lower() != lang:
+                continue
+            for term in lang_set.iter("term"):
+                if term.text and term.text.strip():
+                    return f"term:{lang}:" + normalize(term.text, fold=True)
+    else:
+        raise ValueError(f"Unknown merge key '{by}'. Use 'ref' or 'term'.")
+    return ""
+
+def child_signature(element) -> tuple:
+    return (element.tag, tuple(sorted(element.attrib.items())), (element.text or "").strip())
+
+def merge_term_entries(target, other):
+    # Union the children of other into target: descrip (and any other child)
+    # by tag, attributes and text; langSet by xml:lang, then tig by term text.
+    # New descrips go before the first langSet, where TBX expects them.
+    lang_sets = {lang_set.get("{http://www.w3.org/XML/1998/namespace}lang"): lang_set
+                 for lang_set in target.iterchildren("langSet")}
+    first_lang_set = next(iter(lang_sets.values()), None)
+    seen = {child_signature(child) for child in target if child.tag != "langSet"}
+    for child in other:
+        if not isinstance(child.tag, str):
+            continue
+        if child.tag == "langSet":
+            lang = child.get("{http://www.w3.org/XML/1998/namespace}lang")
+            lang_set = lang_sets.get(lang)
+            if lang_set is None:
+                lang_sets[lang] = child
+                target.append(child)
+                if first_lang_set is None:
+                    first_lang_set = child
+                continue
+            terms = {(term.text or "").strip() for term in lang_set.iter("term")}
+            for tig in child:
+                if not isinstance(tig.tag, str):
+                    continue
+                tig_terms = {(term.text or "").strip() for term in tig.iter("term")}
+                if not tig_terms or not tig_terms <= terms:
+                    terms |= tig_terms
+                    lang_set.append(tig)
+        else:
+            signature = child_signature(child)
+            if signature not in seen:
+                seen.add(signature)
+                if first_lang_set is None:
+                    target.append(child)
+                else:
+                    first_lang_set.addprevious(child)
+    return target
+
+def write_record(f, seq: int, key: bytes, fragment: bytes):
+    f.write(RECORD.pack(seq, len(key), len(fragment)))
+    f.write(key)
+    f.write(fragment)
+
+def read_records(path: str):
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(RECORD.size)
+            if not header:
+                return
+            seq, key_length, fragment_length = RECORD.unpack(header)
+            key = f.read(key_length)
+            yield seq, key, f.read(fragment_length)
+
+def partition_index(key: bytes, partitions: int) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") % partitions
+
+def merge_tbx(input_paths: list, output_path: str, by: str = "ref", lang: str = None,
+              partitions: int = DEFAULT_PARTITIONS, tmp_dir: str = None, compact: bool = False,
+              dialect: str = "legacy") -> dict:
+    # Returns the number of entries read and written. The inputs may be of
+    # either dialect; the output is written in dialect.
+    lang = lang.lower() if lang else None
+    if by == "term" and not lang:
+        raise ValueError("Merging by term needs the language of the key terms.")
+    stats = {"read": 0, "written": 0}
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as work_dir:
+        # Pass 1: hash-partition the entries
+        partition_paths = [os.path.join(work_dir, f"part{i}") for i in range(partitions)]
+        files = [open(path, "wb") for path in partition_paths]
+        try:
+            seq = 0
+            for input_path in input_paths:
+                for term_entry in iter_term_entry_elements(input_path):
+                    key = entry_key(term_entry, by, lang)
+                    # Entries without a key are never merged
+                    key = (key or f"seq:{seq}").encode("utf-8")
+                    write_record(files[partition_index(key, partitions)], seq, key, serialize_term_entry(term_entry, compact))
+                    seq += 1
+            stats["read"] = seq
+        finally:
+            for f in files:
+                f.close()
+
+        # Pass 2: merge duplicates partition by partition
+        run_paths = []
+        for partition_path in partition_paths:
+            groups = {}
+            for seq, key, fragment in read_records(partition_path):
+                groups.setdefault(key, []).append((seq, fragment))
+            os.remove(partition_path)
+            merged = []
+            for records in groups.values():
+                seq, fragment = records[0]
+                if len(records) > 1:
+                    term_entry = etree.fromstring(fragment)
+                    for _, other in records[1:]:
+                        merge_term_entries(term_entry, etree.fromstring(other))
+                    fragment = serialize_term_entry(term_entry, compact)
+                merged.append((seq, fragment))
+            merged.sort(key=lambda record: record[0])
+            run_path = partition_path + ".run"
+            with open(run_path, "wb") as f:
+                for seq, fragment in merged:
+                    write_record(f, seq, b"", fragment)
+            run_paths.append(run_path)
+
+        # Pass 3: k-way merge of the sorted runs
+        runs = [read_records(path) for path in run_paths]
+        offsets = []
+        write_tbx_fragments(output_path, (fragment for _, _, fragment in heapq.merge(*runs, key=lambda record: record[0])), offsets,
+                            compact, dialect)
+        # tbx3 leaves out entries without terms (see dialect.to_concept_entry)
+        stats["written"] = sum(1 for _, length in offsets if length)
+    return stats
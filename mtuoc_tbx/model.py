@@ -0,0 +1,269 @@
+from array import array
+from collections import OrderedDict
+from lxml import etree
+
+from .cells import CACHE_SIZE, VALUE_SEPARATOR, column_key, join_cell, join_terms, split_cell, split_terms
+
+# Compact in-memory termbase. A TermStore keeps the part of TBX that the
+# converters read and write (termEntry > descrip | langSet > tig > term) in
+# flat arrays instead of one lxml element or dict per entry:
+#
+#   entry i          children entry_children[i]:entry_children[i + 1]
+#   child j          kind (descrip/langSet), type and xml:lang symbols, and
+#                    values child_values[j]:child_values[j + 1]
+#   value k          text k of the string pool (a descrip has one value, a
+#                    langSet one per term)
+#
+# Types and language codes are interned in a symbol table and all texts are
+# stored back to back as UTF-8, so an entry costs a few dozen bytes on top of
+# its text instead of several hundred. A descrip text repeated within the
+# last CACHE_SIZE distinct ones (a subject field, a shared definition) is
+# stored once.
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+DESCRIP = 0
+LANG_SET = 1
+# Value id of a missing (None) text
+NO_TEXT = 0xFFFFFFFF
+
+class StringPool:
+    __slots__ = ("data", "offsets", "recent")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+        # text -> index of the most recently added distinct texts, oldest first
+        self.recent = OrderedDict()
+
+    def add(self, text: str) -> int:
+        self.data += text.encode("utf-8")
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+    def add_shared(self, text: str) -> int:
+        # Like add(), but a text equal to one of the last CACHE_SIZE distinct
+        # shared texts reuses its index
+        index = self.recent.get(text)
+        if index is not None:
+            self.recent.move_to_end(text)
+            return index
+        index = self.recent[text] = self.add(text)
+        if len(self.recent) > CACHE_SIZE:
+            self.recent.popitem(last=False)
+        return index
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getstate__(self):
+        # The cache only matters while the pool is being filled
+        return self.data, self.offsets
+
+    def __setstate__(self, state):
+        self.data, self.offsets = state
+        self.recent = OrderedDict()
+
+class TermRecord:
+    # Read-only view of one entry: descrips are (type, lang, text) tuples,
+    # lang_sets (lang, terms) tuples. children keeps their original order.
+    __slots__ = ("children",)
+
+    def __init__(self, children: tuple):
+        self.children = children
+
+    @property
+    def descrips(self) -> list:
+        return [child[1:] for child in self.children if child[0] == DESCRIP]
+
+    @property
+    def lang_sets(self) -> list:
+        return [(child[2], child[3]) for child in self.children if child[0] == LANG_SET]
+
+    def __repr__(self) -> str:
+        return f"TermRecord({self.children!r})"
+
+class TermStore:
+    __slots__ = ("symbols", "symbol_ids", "texts", "entry_children", "child_kind", "child_type", "child_lang",
+                 "child_values", "values")
+
+    def __init__(self):
+        self.symbols = [None]
+        self.symbol_ids = {None: 0}
+        self.texts = StringPool()
+        self.entry_children = array("Q", [0])
+        self.child_kind = array("B")
+        self.child_type = array("H")
+        self.child_lang = array("H")
+        self.child_values = array("Q", [0])
+        self.values = array("I")
+
+    def symbol(self, name: str) -> int:
+        symbol_id = self.symbol_ids.get(name)
+        if symbol_id is None:
+            symbol_id = self.symbol_ids[name] = len(self.symbols)
+            self.symbols.append(name)
+        return symbol_id
+
+    def add_child(self, kind: int, type_: str, lang: str, texts):
+        self.child_kind.append(kind)
+        self.child_type.append(self.symbol(type_))
+        self.child_lang.append(self.symbol(lang))
+        add = self.texts.add_shared if kind == DESCRIP else self.texts.add
+        for text in texts:
+            self.values.append(NO_TEXT if text is None else add(text))
+        self.child_values.append(len(self.values))
+
+    def end_entry(self):
+        self.entry_children.append(len(self.child_kind))
+
+    def append_term_entry(self, term_entry):
+        # From a termEntry element; other elements and attributes are dropped
+        for child in term_entry:
+            if child.tag == "descrip":
+                self.add_child(DESCRIP, child.get("type"), child.get(XML_LANG), (child.text,))
+            elif child.tag == "langSet":
+                self.add_child(LANG_SET, None, child.get(XML_LANG), [term.text for term in child.iter("term")])
+        self.end_entry()
+
+    def append_row(self, values, layout, value_separator: str = VALUE_SEPARATOR):
+        # From a tabular row and its layout (see tabular.classify_columns);
+        # gives the same entry as tabular.row_to_term_entry.
+        for index, kind, attrib in layout:
+            val = values[index]
+            if not val:
+                continue
+            if kind == "descrip":
+                for text in split_cell(val, value_separator):
+                    self.add_child(DESCRIP, attrib["type"], attrib.get(XML_LANG), (text,))
+            else:
+                self.add_child(LANG_SET, None, attrib[XML_LANG], split_terms(val, value_separator))
+        self.end_entry()
+
+    def __len__(self) -> int:
+        return len(self.entry_children) - 1
+
+    def iter_children(self, index: int):
+        # (kind, type, lang, texts) of every child of entry index
+        symbols = self.symbols
+        texts = self.texts
+        for child in range(self.entry_children[index], self.entry_children[index + 1]):
+            child_texts = tuple(None if value == NO_TEXT else texts[value]
+                                for value in self.values[self.child_values[child]:self.child_values[child + 1]])
+            yield self.child_kind[child], symbols[self.child_type[child]], symbols[self.child_lang[child]], child_texts
+
+    def record(self, index: int) -> TermRecord:
+        children = []
+        for kind, type_, lang, texts in self.iter_children(index):
+            children.append((DESCRIP, type_, lang, texts[0]) if kind == DESCRIP else (LANG_SET, None, lang, texts))
+        return TermRecord(tuple(children))
+
+    def __getitem__(self, index: int) -> TermRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TermStore index out of range")
+        return self.record(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def term_entry(self, index: int) -> etree._Element:
+        term_entry = etree.Element("termEntry")
+        for kind, type_, lang, texts in self.iter_children(index):
+            if kind == DESCRIP:
+                descrip = etree.SubElement(term_entry, "descrip")
+                if type_ is not None:
+                    descrip.set("type", type_)
+                if lang is not None:
+                    descrip.set(XML_LANG, lang)
+                descrip.text = texts[0]
+            else:
+                lang_set = etree.SubElement(term_entry, "langSet")
+                if lang is not None:
+                    lang_set.set(XML_LANG, lang)
+                for text in texts:
+                    tig = etree.SubElement(lang_set, "tig")
+                    term = etree.SubElement(tig, "term")
+                    term.text = text
+        return term_entry
+
+    def iter_term_entries(self):
+        for index in range(len(self)):
+            yield self.term_entry(index)
+
+    def flat(self, index: int, value_separator: str = VALUE_SEPARATOR) -> dict:
+        # Same dict, with the same key order, as reader.flatten_term_entry()
+        # of the entry: descrips first, then langSets.
+        entry = {}
+        lang_keys = set()
+        children = list(self.iter_children(index))
+        for wanted in (DESCRIP, LANG_SET):
+            for kind, type_, lang, texts in children:
+                if kind != wanted:
+                    continue
+                if kind == DESCRIP:
+                    key = column_key(type_, lang)
+                elif lang:
+                    key = lang
+                    lang_keys.add(key)
+                else:
+                    continue
+                texts = [text.strip() for text in texts if text]
+                if texts:
+                    entry.setdefault(key, []).extend(texts)
+        return {key: join_terms(texts, value_separator) if key in lang_keys else join_cell(texts, value_separator)
+                for key, texts in entry.items()}
+
+    def iter_flat(self, value_separator: str = VALUE_SEPARATOR):
+        for index in range(len(self)):
+            yield self.flat(index, value_separator)
+
+    def to_columns(self, value_separator: str = VALUE_SEPARATOR) -> dict:
+        # Flat values column by column ("" where an entry has no value),
+        # ready for pd.DataFrame()
+        columns = {}
+        for index, entry in enumerate(self.iter_flat(value_separator)):
+            for key, value in entry.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [""] * index
+                column.append(value)
+            for column in columns.values():
+                if len(column) == index:
+                    column.append("")
+        return columns
+
+    def columns(self) -> list:
+        # Flat keys in order of first appearance, as pd.DataFrame(entries)
+        # would order them
+        columns = {}
+        for entry in self.iter_flat():
+            for key in entry:
+                columns.setdefault(key)
+        return list(columns)
+
+    def select(self, indices) -> "TermStore":
+        # New store with the given entries in the given order, e.g. for
+        # sorting (sorted(range(len(store)), key=...)) or deduplication
+        store = TermStore()
+        for index in indices:
+            for kind, type_, lang, texts in self.iter_children(index):
+                store.add_child(kind, type_, lang, texts)
+            store.end_entry()
+        return store
+
+    def nbytes(self) -> int:
+        # Size of the arrays and string data, without the symbol table
+        arrays = (self.texts.offsets, self.entry_children, self.child_kind, self.child_type, self.child_lang,
+                  self.child_values, self.values)
+        return len(self.texts.data) + sum(len(a) * a.itemsize for a in arrays)
+
+def store_from_term_entries(term_entries) -> TermStore:
+    store = TermStore()
+    for term_entry in term_entries:
+        store.append_term_entry(term_entry)
+    return store
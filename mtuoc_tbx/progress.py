@@ -0,0 +1,163 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+# Instrumentation for long conversions. A Progress object is passed to the
+# converters (progress=...), which then time their stages, count entries and
+# check for cancellation:
+#
+#   read       parsing the input (rows, sheets or XML elements)
+#   build      building termEntry elements or flat records
+#   serialize  turning termEntry elements into TBX bytes
+#   write      writing the output
+#
+# Stage times are exclusive: time spent in a stage nested in another one is
+# only counted once. Without progress the converters run uninstrumented.
+
+class ConversionCancelled(Exception):
+    pass
+
+class Stage:
+    __slots__ = ("progress", "name", "start")
+
+    def __init__(self, progress, name: str):
+        self.progress = progress
+        self.name = name
+
+    def __enter__(self):
+        self.progress.nested.append(0.0)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        nested = self.progress.nested
+        stages = self.progress.stages
+        stages[self.name] = stages.get(self.name, 0.0) + elapsed - nested.pop()
+        if nested:
+            nested[-1] += elapsed
+
+class Progress:
+    def __init__(self, callback=None, interval: float = 0.5):
+        # callback(progress) is called from the converting thread at most
+        # every interval seconds.
+        self.callback = callback
+        self.interval = interval
+        self.entries = 0
+        self.stages = {}
+        self.nested = []
+        self.cancelled = False
+        self.started = time.perf_counter()
+        self.finished = None
+        self.next_report = self.started + interval
+
+    def stage(self, name: str) -> Stage:
+        return Stage(self, name)
+
+    def timed(self, iterable, name: str, count: bool = False):
+        # Time every step of iterable as stage name; with count, every item
+        # is also counted as an entry.
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            if count:
+                self.advance()
+            yield item
+
+    def advance(self, entries: int = 1):
+        self.entries += entries
+        if self.cancelled:
+            raise ConversionCancelled("Conversion cancelled.")
+        if self.callback is not None:
+            now = time.perf_counter()
+            if now >= self.next_report:
+                self.next_report = now + self.interval
+                self.callback(self)
+
+    def cancel(self):
+        # Safe to call from another thread; the conversion stops at the next
+        # entry with ConversionCancelled.
+        self.cancelled = True
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        if self.callback is not None:
+            self.callback(self)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.entries / elapsed if elapsed else 0.0
+
+    def report(self) -> dict:
+        return {
+            "entries": self.entries,
+            "seconds": round(self.elapsed, 3),
+            "entries_per_s": round(self.rate),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+def peak_rss_mb() -> float:
+    # Peak resident memory of this process, or None where the resource
+    # module is not available (Windows). Worker processes are not included.
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+def print_progress(progress: Progress):
+    # Callback for the command line tools: a status line on stderr
+    line = f"{progress.entries:,} entries  {progress.rate:,.0f} entries/s  {progress.elapsed:.1f} s"
+    end = "\n" if progress.finished else ""
+    print(f"\r{line}", end=end, file=sys.stderr, flush=True)
+
+@contextmanager
+def profiled(path: str = None):
+    # Run the body under cProfile and save the stats to path (for pstats or
+    # snakeviz). Does nothing when path is None.
+    if path is None:
+        yield
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+def add_arguments(parser):
+    parser.add_argument("--progress", action="store_true", help="Show the number of converted entries and the throughput on stderr.")
+    parser.add_argument("--stats", default=None, metavar="FILE", help="Write timings per stage, throughput and peak memory to this JSON file.")
+    parser.add_argument("--profile", default=None, metavar="FILE", help="Run under cProfile and save the stats to this file.")
+
+def run_with_arguments(args, convert, *convert_args, **convert_kwargs):
+    # Run convert with the instrumentation requested by add_arguments()
+    progress = None
+    if args.progress or args.stats:
+        progress = Progress(print_progress if args.progress else None)
+        convert_kwargs["progress"] = progress
+    with profiled(args.profile):
+        result = convert(*convert_args, **convert_kwargs)
+    if progress is not None:
+        progress.finish()
+        if args.stats:
+            progress.dump(args.stats)
+    return result
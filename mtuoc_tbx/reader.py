@@ -0,0 +1,252 @@
+import mmap
+import os
+import sys
+from lxml import etree
+from collections import defaultdict
+from contextlib import nullcontext
+
+from .cells import VALUE_SEPARATOR, column_key, join_cell, join_terms
+from .compression import compression_of, strip_compression
+from .dialect import Dialect, detect_dialect
+from .model import TermStore
+from .sinks import discover_columns, get_sink
+
+# Bytes handed to the parser at a time when a shard is read from the mmap
+SHARD_FEED_BYTES = 1 << 20
+# Shards per worker, so that uneven shards still balance across the pool
+SHARDS_PER_WORKER = 4
+
+class Projection:
+    # The parts of a termEntry that are read: langSets and descrips in langs
+    # (descrips without xml:lang are kept), descrips of the given types
+    # (fields), and only entries with one of the subject fields. None keeps
+    # everything. Entries are projected as soon as they are parsed, before
+    # they are flattened or stored.
+    __slots__ = ("langs", "fields", "subject_fields")
+
+    def __init__(self, langs=None, fields=None, subject_fields=None):
+        self.langs = frozenset(lang.lower() for lang in langs) if langs else None
+        self.fields = frozenset(fields) if fields else None
+        self.subject_fields = frozenset(field.strip().casefold() for field in subject_fields) if subject_fields else None
+
+    def apply(self, term_entry) -> bool:
+        # Removes the unwanted children of term_entry in place. False when
+        # the whole entry is to be skipped: outside the subject fields, or
+        # without any langSet in langs.
+        if self.subject_fields is not None and not any(
+                descrip.get("type") == "subjectField" and descrip.text
+                and descrip.text.strip().casefold() in self.subject_fields
+                for descrip in term_entry.iterchildren("descrip")):
+            return False
+        found = False
+        for child in term_entry.iterchildren("descrip", "langSet"):
+            lang = child.get("{http://www.w3.org/XML/1998/namespace}lang")
+            if child.tag == "langSet":
+                if self.langs is None or (lang or "").lower() in self.langs:
+                    found = True
+                    continue
+            elif ((self.fields is None or child.get("type") in self.fields)
+                  and (self.langs is None or not lang or lang.lower() in self.langs)):
+                continue
+            term_entry.remove(child)
+        return found or self.langs is None
+
+def flatten_term_entry(term_entry, value_separator: str = VALUE_SEPARATOR) -> dict:
+    # Keys are interned and repeated values shared (see mtuoc_tbx.cells), so
+    # a list of flat records does not hold one copy of them per entry.
+    entry = defaultdict(list)
+    lang_keys = set()
+
+    for descrip in term_entry.findall("descrip"):
+        key = column_key(descrip.get("type"), descrip.get("{http://www.w3.org/XML/1998/namespace}lang"))
+        if descrip.text:
+            entry[key].append(descrip.text.strip())
+
+    for lang_set in term_entry.findall("langSet"):
+        lang = lang_set.get("{http://www.w3.org/XML/1998/namespace}lang")
+        if lang:
+            terms = [term.text.strip() for term in lang_set.findall(".//term") if term.text]
+            if terms:
+                lang = sys.intern(lang)
+                if lang not in entry:
+                    lang_keys.add(lang)
+                entry[lang].extend(terms)
+
+    return {k: join_terms(v, value_separator) if k in lang_keys else join_cell(v, value_separator)
+            for k, v in entry.items()}
+
+def free_element(element):
+    # Free a parsed element, and the already processed siblings before it, so
+    # that an incremental parse does not build up the whole document
+    element.clear(keep_tail=True)
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+def iter_term_entry_elements(input_path: str, projection: Projection = None, dialect: Dialect = None):
+    # Incremental reader: each termEntry is yielded on its end event and then
+    # freed, together with the already processed siblings, so the full TBX
+    # document is never held in memory. TBX v3 conceptEntry elements are
+    # yielded as legacy termEntry elements (see mtuoc_tbx.dialect).
+    dialect = dialect or detect_dialect(input_path)
+    with dialect.open(input_path) as f:
+        for _, term_entry in etree.iterparse(f, events=("end",), tag=dialect.entry_tag):
+            if dialect.renames:
+                dialect.to_legacy(term_entry)
+            if projection is None or projection.apply(term_entry):
+                yield term_entry
+
+            free_element(term_entry)
+
+def iter_entries(input_path: str, value_separator: str = VALUE_SEPARATOR, projection: Projection = None):
+    for term_entry in iter_term_entry_elements(input_path, projection):
+        yield flatten_term_entry(term_entry, value_separator)
+
+def read_store(input_path: str, progress=None, projection: Projection = None) -> TermStore:
+    store = TermStore()
+    if progress is None:
+        for term_entry in iter_term_entry_elements(input_path, projection):
+            store.append_term_entry(term_entry)
+        return store
+    for term_entry in progress.timed(iter_term_entry_elements(input_path, projection), "read"):
+        with progress.stage("build"):
+            store.append_term_entry(term_entry)
+        progress.advance()
+    return store
+
+def find_term_entry(mm, pos: int, start_tag: bytes = b"<termEntry") -> int:
+    while True:
+        pos = mm.find(start_tag, pos)
+        if pos == -1 or mm[pos + len(start_tag):pos + len(start_tag) + 1] in (b">", b"/", b" ", b"\t", b"\r", b"\n"):
+            return pos
+        pos += len(start_tag)
+
+def find_shards(input_path: str, shards: int, entry_name: str = "termEntry") -> list:
+    # Split the file into byte ranges that start at a <termEntry (or
+    # <conceptEntry) boundary. The last range stops before </body>, so every
+    # range holds a sequence of complete entries.
+    if os.path.getsize(input_path) == 0:
+        return []
+    start_tag = b"<" + entry_name.encode()
+    with open(input_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        first = find_term_entry(mm, 0, start_tag)
+        if first == -1:
+            return []
+        end = mm.rfind(b"</body>")
+        if end < first:
+            end_tag = b"</" + entry_name.encode() + b">"
+            end = mm.rfind(end_tag) + len(end_tag)
+        bounds = [first]
+        for k in range(1, shards):
+            pos = find_term_entry(mm, max(bounds[-1] + 1, first + (end - first) * k // shards), start_tag)
+            if pos == -1 or pos >= end:
+                break
+            bounds.append(pos)
+        bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+def iter_shard_elements(input_path: str, start: int, end: int, dialect: Dialect = None):
+    # Yield the termEntry elements of the bytes [start, end) of an
+    # uncompressed file (see find_shards). The byte range is fed from the
+    # mmap to a pull parser under a synthetic root; xml:lang needs no
+    # declaration and the shard is assumed to be UTF-8, like the files the
+    # writers emit. The bytes of a TBX v3 file go through the dialect's
+    # translator. Each element is freed once the next one is asked for.
+    translator = dialect.translator() if dialect else None
+    parser = etree.XMLPullParser(events=("end",), tag="termEntry")
+    parser.feed(b"<shard>")
+    with open(input_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for pos in range(start, end, SHARD_FEED_BYTES):
+            data = mm[pos:min(pos + SHARD_FEED_BYTES, end)]
+            parser.feed(translator.feed(data) if translator else data)
+            for _, term_entry in parser.read_events():
+                yield term_entry
+                free_element(term_entry)
+    parser.feed((translator.close() if translator else b"") + b"</shard>")
+    parser.close()
+    for _, term_entry in parser.read_events():
+        yield term_entry
+
+def flatten_shard(input_path: str, start: int, end: int, value_separator: str = VALUE_SEPARATOR,
+                  projection: Projection = None, dialect: Dialect = None) -> list:
+    # Worker side of the sharded reader
+    return [flatten_term_entry(term_entry, value_separator)
+            for term_entry in iter_shard_elements(input_path, start, end, dialect)
+            if projection is None or projection.apply(term_entry)]
+
+def iter_entries_parallel(input_path: str, workers: int, value_separator: str = VALUE_SEPARATOR,
+                          projection: Projection = None):
+    # Shards are flattened in a process pool and yielded back in file order,
+    # so the merged records match iter_entries().
+    from multiprocessing import Pool
+
+    dialect = detect_dialect(input_path)
+    shards = find_shards(input_path, workers * SHARDS_PER_WORKER, dialect.entry_name)
+    with Pool(workers) as pool:
+        args = [(input_path, start, end, value_separator, projection, dialect) for start, end in shards]
+        for entries in pool.starmap(flatten_shard, args):
+            yield from entries
+
+def iter_instrumented_entries(input_path: str, workers: int, progress, value_separator: str = VALUE_SEPARATOR,
+                              projection: Projection = None):
+    if workers and workers > 1:
+        # Parsing and flattening both happen in the workers
+        yield from progress.timed(iter_entries_parallel(input_path, workers, value_separator, projection), "read",
+                                  count=True)
+        return
+    for term_entry in progress.timed(iter_term_entry_elements(input_path, projection), "read"):
+        with progress.stage("build"):
+            entry = flatten_term_entry(term_entry, value_separator)
+        progress.advance()
+        yield entry
+
+def read_entries(input_path: str, workers: int = None, progress=None, value_separator: str = VALUE_SEPARATOR,
+                 projection: Projection = None):
+    if workers and (compression_of(input_path) or not detect_dialect(input_path).shardable):
+        # A compressed file cannot be split into byte ranges for the workers,
+        # nor a file with prefixed entries be parsed without its root
+        workers = None
+    if progress is not None:
+        return iter_instrumented_entries(input_path, workers, progress, value_separator, projection)
+    if workers and workers > 1:
+        return iter_entries_parallel(input_path, workers, value_separator, projection)
+    return iter_entries(input_path, value_separator, projection)
+
+def tbx_to_excel(input_path: str, output_path: str, workers: int = None, columns: list = None,
+                 write_only: bool = False, progress=None, value_separator: str = VALUE_SEPARATOR,
+                 projection: Projection = None):
+    # .csv, .tsv and .parquet outputs (and .xlsx with write_only) are streamed
+    # through a sink. Unless the columns are declared, a first pass over the
+    # file discovers them. progress is an optional
+    # mtuoc_tbx.progress.Progress. The input, and .csv or .tsv outputs, may
+    # be compressed (.gz, .xz, .bz2, .zst). value_separator joins the values
+    # of multi-valued cells. projection (see Projection) restricts the
+    # languages, descrip types and subject fields that are read.
+    stage = progress.stage if progress is not None else lambda name: nullcontext()
+    ext = os.path.splitext(strip_compression(output_path))[1].lower()
+    if compression_of(output_path) and ext not in (".csv", ".tsv"):
+        raise ValueError("Only .csv and .tsv output can be compressed.")
+    if write_only or ext in (".csv", ".tsv", ".parquet"):
+        sink = get_sink(output_path)
+        if columns is None:
+            with stage("discover"):
+                columns = discover_columns(read_entries(input_path, workers, value_separator=value_separator,
+                                                          projection=projection))
+        with stage("write"):
+            sink(read_entries(input_path, workers, progress, value_separator, projection), output_path, columns)
+        return
+
+    import pandas as pd
+
+    if workers and workers > 1:
+        entries = list(read_entries(input_path, workers, progress, value_separator, projection))
+        with stage("build"):
+            df = pd.DataFrame(entries)
+            df.fillna("", inplace=True)
+    else:
+        # Held as a compact TermStore rather than one dict per entry until
+        # the DataFrame is built
+        store = read_store(input_path, progress, projection)
+        with stage("build"):
+            df = pd.DataFrame(store.to_columns(value_separator))
+    with stage("write"):
+        df.to_excel(output_path, index=False)
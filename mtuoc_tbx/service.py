@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+# direction -> (module, function, input extension, output extension)
+DIRECTIONS = {
+    "csv2tbx": ("tabular", "csv_to_tbx", ".csv", ".tbx"),
+    "tsv2tbx": ("tabular", "tsv_to_tbx", ".tsv", ".tbx"),
+    "excel2tbx": ("tabular", "excel_to_tbx", ".xlsx", ".tbx"),
+    "to2tbx": ("termcat", "xml_to_tbx_extended", ".xml", ".tbx"),
+    "tbx2excel": ("reader", "tbx_to_excel", ".tbx", ".xlsx"),
+}
+# Direction used for each input extension in directory batches
+EXTENSION_DIRECTIONS = {ext: direction for direction, (_, _, ext, _) in DIRECTIONS.items()}
+STREAM_BYTES = 1 << 20
+
+def get_converter(direction: str):
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction '{direction}'. Use one of: {', '.join(DIRECTIONS)}")
+    module, function, _, _ = DIRECTIONS[direction]
+    # Imported on first use; in a long-running worker this happens once
+    module = __import__(f"mtuoc_tbx.{module}", fromlist=[function])
+    return getattr(module, function)
+
+def run_job(job: dict) -> dict:
+    # job: {"direction", "input", "output", "options"}. Runs in a worker
+    # process and never raises, so one bad job does not stop a batch.
+    start = time.perf_counter()
+    result = {"input": job.get("input"), "output": job.get("output"), "direction": job.get("direction")}
+    try:
+        convert = get_converter(job["direction"])
+        convert(job["input"], job["output"], **job.get("options", {}))
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def _warm_up():
+    # Import the heavy libraries once per worker process
+    import pandas
+    from . import reader, tabular, termcat
+
+def directory_jobs(input_dir: str, output_dir: str) -> list:
+    # <stem>.csv becomes <stem>.tbx; when several inputs share a stem the
+    # full file name is kept (<stem>.csv.tbx) so outputs do not collide.
+    names = [name for name in sorted(os.listdir(input_dir))
+             if os.path.splitext(name)[1].lower() in EXTENSION_DIRECTIONS]
+    stems = [os.path.splitext(name)[0] for name in names]
+    jobs = []
+    for name, stem in zip(names, stems):
+        direction = EXTENSION_DIRECTIONS[os.path.splitext(name)[1].lower()]
+        base = stem if stems.count(stem) == 1 else name
+        jobs.append({
+            "direction": direction,
+            "input": os.path.join(input_dir, name),
+            "output": os.path.join(output_dir, base + DIRECTIONS[direction][3]),
+        })
+    return jobs
+
+def manifest_jobs(manifest_path: str) -> list:
+    # One JSON job per line
+    with open(manifest_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def run_batch(jobs: list, workers: int = None):
+    # Yield the result of every job, in job order, from a warm process pool
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as executor:
+        yield from executor.map(run_job, jobs)
+
+class ConversionService:
+    # Minimal HTTP/1.1 server on asyncio:
+    #
+    #   GET  /health               -> {"status": "ok"}
+    #   POST /jobs                 JSON job with local paths -> JSON result.
+    #                              Content-Type must be application/json, so
+    #                              that a web page cannot send one without a
+    #                              CORS preflight, and the output must be
+    #                              under work_dir (relative ones are taken
+    #                              from there).
+    #   POST /convert/<direction>  body is the input file; the response body
+    #                              streams the converted file. ?format=csv
+    #                              (tsv, parquet) changes the tbx2excel output.
+    #
+    # Jobs run on a warm process pool; at most max_pending are accepted at a
+    # time, further requests wait for a free slot.
+
+    def __init__(self, workers: int = None, max_pending: int = None, work_dir: str = None):
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up)
+        self.pending = asyncio.Semaphore(max_pending or (workers or os.cpu_count() or 1) * 4)
+        self.work_dir = os.path.realpath(work_dir or os.getcwd())
+
+    def output_in_work_dir(self, output_path) -> str:
+        # The resolved output path, or None when it is outside work_dir
+        if not isinstance(output_path, str):
+            return None
+        output_path = os.path.realpath(os.path.join(self.work_dir, output_path))
+        if os.path.commonpath([self.work_dir, output_path]) != self.work_dir:
+            return None
+        return output_path
+
+    async def run(self, job: dict) -> dict:
+        async with self.pending:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, run_job, job)
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            if len(request_line) < 2:
+                return
+            method, target = request_line[0], request_line[1]
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            url = urlsplit(target)
+
+            if method == "GET" and url.path == "/health":
+                await self.respond_json(writer, 200, {"status": "ok"})
+            elif method == "POST" and url.path == "/jobs":
+                content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+                if content_type != "application/json":
+                    await self.respond_json(writer, 415, {"status": "error",
+                                                          "error": "Jobs must be sent as application/json"})
+                    return
+                job = json.loads(await reader.readexactly(length))
+                output_path = self.output_in_work_dir(job.get("output"))
+                if output_path is None:
+                    await self.respond_json(writer, 403, {"status": "error",
+                                                          "error": f"The output must be under {self.work_dir}"})
+                    return
+                result = await self.run(dict(job, output=output_path))
+                await self.respond_json(writer, 200 if result["status"] == "ok" else 500, result)
+            elif method == "POST" and url.path.startswith("/convert/"):
+                await self.convert_upload(reader, writer, url.path[len("/convert/"):], parse_qs(url.query), length)
+            else:
+                await self.respond_json(writer, 404, {"status": "error", "error": "Not found"})
+        except Exception as e:
+            await self.respond_json(writer, 400, {"status": "error", "error": f"{type(e).__name__}: {e}"})
+        finally:
+            writer.close()
+
+    async def convert_upload(self, reader, writer, direction: str, query: dict, length: int):
+        if direction not in DIRECTIONS:
+            await self.respond_json(writer, 404, {"status": "error", "error": f"Unknown direction '{direction}'"})
+            return
+        _, _, input_ext, output_ext = DIRECTIONS[direction]
+        if "format" in query:
+            output_ext = "." + query["format"][0].lstrip(".")
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_path = os.path.join(work_dir, "input" + input_ext)
+            output_path = os.path.join(work_dir, "output" + output_ext)
+            with open(input_path, "wb") as f:
+                remaining = length
+                while remaining:
+                    data = await reader.read(min(remaining, STREAM_BYTES))
+                    if not data:
+                        break
+                    f.write(data)
+                    remaining -= len(data)
+            result = await self.run({"direction": direction, "input": input_path, "output": output_path})
+            if result["status"] != "ok":
+                await self.respond_json(writer, 500, result)
+                return
+            size = os.path.getsize(output_path)
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+                         f"Content-Length: {size}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+            # Once the headers are out an error response cannot follow: the
+            # connection is dropped, and the client sees a short body
+            try:
+                with open(output_path, "rb") as f:
+                    while True:
+                        data = f.read(STREAM_BYTES)
+                        if not data:
+                            break
+                        writer.write(data)
+                        await writer.drain()
+            except Exception:
+                writer.transport.abort()
+
+    async def respond_json(self, writer, status: int, body: dict):
+        reasons = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 415: "Unsupported Media Type",
+                   500: "Internal Server Error"}
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, socket_path: str = None):
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
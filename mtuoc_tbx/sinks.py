@@ -0,0 +1,78 @@
+import csv
+import os
+
+from .compression import open_text, strip_compression
+
+# Records buffered per Parquet row group
+PARQUET_BATCH_ROWS = 65536
+
+def discover_columns(entries) -> list:
+    # Column order of the first appearance of each key, the same order that
+    # pd.DataFrame(entries) would produce.
+    columns = {}
+    for entry in entries:
+        for key in entry:
+            if key not in columns:
+                columns[key] = None
+    return list(columns)
+
+def write_delimited(entries, output_path: str, columns: list, delimiter: str):
+    # Keys that are not in columns are dropped, so a declared header also
+    # works as a projection.
+    with open_text(output_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, delimiter=delimiter, restval="",
+                                extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(entries)
+
+def write_csv(entries, output_path: str, columns: list):
+    write_delimited(entries, output_path, columns, ",")
+
+def write_tsv(entries, output_path: str, columns: list):
+    write_delimited(entries, output_path, columns, "\t")
+
+def write_parquet(entries, output_path: str, columns: list):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output requires pyarrow (pip install pyarrow).") from None
+
+    def to_table(batch):
+        return pa.table({column: [entry.get(column, "") for entry in batch] for column in columns}, schema=schema)
+
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    with pq.ParquetWriter(output_path, schema, compression="zstd") as writer:
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(to_table(batch))
+                batch = []
+        if batch:
+            writer.write_table(to_table(batch))
+
+def write_xlsx(entries, output_path: str, columns: list):
+    # openpyxl write-only workbook: rows are flushed to the sheet XML as they
+    # are appended, so memory does not grow with the number of entries.
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    for entry in entries:
+        ws.append([entry.get(column, "") for column in columns])
+    wb.save(output_path)
+
+SINKS = {
+    ".csv": write_csv,
+    ".tsv": write_tsv,
+    ".parquet": write_parquet,
+    ".xlsx": write_xlsx,
+}
+
+def get_sink(output_path: str):
+    ext = os.path.splitext(strip_compression(output_path))[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"Unsupported output format '{ext}'. Use one of: {', '.join(SINKS)}")
+    return SINKS[ext]
@@ -0,0 +1,311 @@
+import csv
+from lxml import etree
+from collections import deque
+from importlib.util import find_spec
+from itertools import islice
+
+from .cells import VALUE_SEPARATOR, check_separator, split_cell, split_terms
+from .compression import open_text
+from .dialect import get_dialect
+from .writer import serialize_term_entry, write_tbx, write_tbx_fragments, write_tbx_instrumented
+
+# Rows sent to a worker process per task in parallel mode
+PARALLEL_BATCH_ROWS = 2000
+# Strings that pd.read_csv reads as missing values; the csv engine maps them
+# to "" too so that both engines produce the same TBX.
+PANDAS_NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+# The readers below produce "blocks": (columns, rows) pairs where columns is
+# a tuple of header names and rows an iterable of value sequences in that
+# order. A file gives one block, or one per chunk or sheet. Each block's rows
+# must be consumed before the next block is requested.
+
+def classify_columns(columns) -> list:
+    # Classify the column layout once per file: each column becomes an
+    # (index, kind, attrib) tuple so that rows can be converted from raw tuples
+    # without looking at the column names again.
+    layout = []
+    for index, col in enumerate(columns):
+        if col.startswith("definition_"):
+            lang = col.replace("definition_", "")
+            layout.append((index, "descrip", {
+                "type": "definition",
+                "{http://www.w3.org/XML/1998/namespace}lang": lang
+            }))
+        elif col == "externalCrossReference":
+            layout.append((index, "descrip", {"type": "externalCrossReference"}))
+        elif col == "subjectField":
+            layout.append((index, "descrip", {"type": "subjectField"}))
+        else:
+            layout.append((index, "langSet", {
+                "{http://www.w3.org/XML/1998/namespace}lang": col
+            }))
+    return layout
+
+def row_to_term_entry(values, layout, value_separator: str = VALUE_SEPARATOR) -> etree._Element:
+    # Multi-valued cells are split on value_separator (see mtuoc_tbx.cells)
+    term_entry = etree.Element("termEntry")
+
+    for index, kind, attrib in layout:
+        val = values[index]
+        if not val:
+            continue
+        if kind == "descrip":
+            for text in split_cell(val, value_separator):
+                descrip = etree.SubElement(term_entry, "descrip", attrib)
+                descrip.text = text
+        else:
+            lang_set = etree.SubElement(term_entry, "langSet", attrib)
+            for term in split_terms(val, value_separator):
+                tig = etree.SubElement(lang_set, "tig")
+                term_elem = etree.SubElement(tig, "term")
+                term_elem.text = term
+
+    return term_entry
+
+def iter_layouts(blocks):
+    # Yield (layout, columns, rows). The layout is classified once and only
+    # re-classified when the columns change, e.g. between the sheets of a
+    # workbook; chunks of the same file share it.
+    columns = layout = None
+    for block_columns, rows in blocks:
+        if columns is None or block_columns != columns:
+            columns = block_columns
+            layout = classify_columns(columns)
+        yield layout, columns, rows
+
+def iter_term_entries(blocks, value_separator: str = VALUE_SEPARATOR):
+    for layout, _, rows in iter_layouts(blocks):
+        for values in rows:
+            yield row_to_term_entry(values, layout, value_separator)
+
+def iter_rows_with_layout(blocks):
+    for layout, _, rows in iter_layouts(blocks):
+        for values in rows:
+            yield values, layout
+
+def serialize_rows(layout, rows, compact: bool = False, value_separator: str = VALUE_SEPARATOR,
+                   dialect: str = "legacy") -> list:
+    # Worker side of the parallel mode: convert a row range and return the
+    # serialized termEntry fragments.
+    return [serialize_term_entry(row_to_term_entry(values, layout, value_separator), compact, dialect)
+            for values in rows]
+
+def iter_row_batches(blocks, batch_size: int):
+    for layout, _, rows in iter_layouts(blocks):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            yield layout, batch
+
+def iter_parallel_fragments(blocks, workers: int, batch_size: int = PARALLEL_BATCH_ROWS, compact: bool = False,
+                            value_separator: str = VALUE_SEPARATOR, dialect: str = "legacy"):
+    # At most two batches per worker are in flight, and results are collected
+    # in submission order so the fragments keep the original row order.
+    from multiprocessing import Pool
+
+    with Pool(workers) as pool:
+        pending = deque()
+        for layout, rows in iter_row_batches(blocks, batch_size):
+            pending.append(pool.apply_async(serialize_rows, (layout, rows, compact, value_separator, dialect)))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+def blocks_to_tbx(blocks, output_path: str, workers: int = None, incremental: str = None, progress=None,
+                  compact: bool = False, value_separator: str = VALUE_SEPARATOR, dialect: str = "legacy"):
+    # incremental names the id column of an incremental rebuild (see
+    # mtuoc_tbx.incremental); that mode runs in a single process and returns
+    # the reused/converted/deleted row counts. progress is an optional
+    # mtuoc_tbx.progress.Progress. compact writes the TBX without
+    # indentation. value_separator splits multi-valued cells. dialect is
+    # "legacy" or "tbx3" (see mtuoc_tbx.dialect).
+    check_separator(value_separator)
+    get_dialect(dialect)
+    if incremental:
+        from .incremental import incremental_blocks_to_tbx
+        return incremental_blocks_to_tbx(blocks, output_path, incremental, progress=progress, compact=compact,
+                                         value_separator=value_separator, dialect=dialect)
+    if workers and workers > 1:
+        fragments = iter_parallel_fragments(blocks, workers, compact=compact, value_separator=value_separator,
+                                            dialect=dialect)
+        if progress is None:
+            write_tbx_fragments(output_path, fragments, compact=compact, dialect=dialect)
+        else:
+            # Reading happens here, building and serializing in the workers
+            with progress.stage("write"):
+                write_tbx_fragments(output_path, progress.timed(fragments, "convert", count=True), compact=compact,
+                                    dialect=dialect)
+    elif progress is None:
+        write_tbx(output_path, iter_term_entries(blocks, value_separator), compact, dialect)
+    else:
+        write_tbx_instrumented(output_path, iter_rows_with_layout(blocks),
+                               lambda item: row_to_term_entry(*item, value_separator), progress, compact, dialect)
+
+def unique_header(header) -> tuple:
+    # Header names as pd.read_csv reports them: empty names become
+    # "Unnamed: <index>" and repeated ones get a ".1", ".2"... suffix.
+    names = []
+    seen = set()
+    for index, name in enumerate(header):
+        name = name or f"Unnamed: {index}"
+        unique = name
+        suffix = 0
+        while unique in seen:
+            suffix += 1
+            unique = f"{name}.{suffix}"
+        seen.add(unique)
+        names.append(unique)
+    return tuple(names)
+
+def blank_row(row: list) -> bool:
+    # A line pd.read_csv skips: empty, or whitespace without a delimiter. The
+    # csv module reads a "" field alone on its line as [""], which is kept;
+    # a quoted whitespace-only field cannot be told apart and is skipped.
+    return not row or (len(row) == 1 and row[0] != "" and not row[0].strip())
+
+def read_delimited_csv(input_path: str, sep: str, quotechar: str = '"'):
+    # pandas-free reader built on the csv module. Rows are streamed, blank
+    # lines are skipped and missing values are read as "", like pd.read_csv.
+    with open_text(input_path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=sep, quotechar=quotechar)
+        header = next((row for row in reader if not blank_row(row)), None)
+        if header is None:
+            # pd.read_csv raises EmptyDataError, a ValueError, here too
+            raise ValueError(f"No columns to parse from file: {input_path}")
+        width = len(header)
+
+        def rows():
+            for row in reader:
+                if blank_row(row):
+                    continue
+                if len(row) > width:
+                    raise ValueError(f"Expected {width} fields in line {reader.line_num}, saw {len(row)}")
+                values = ["" if value in PANDAS_NA_VALUES else value for value in row[:width]]
+                values.extend([""] * (width - len(values)))
+                yield values
+
+        yield unique_header(header), rows()
+
+def read_delimited(input_path: str, sep: str, quotechar: str = '"', chunksize: int = None,
+                   engine: str = "pandas"):
+    # engine="csv" skips pandas (and its import time) altogether; rows are
+    # then always streamed and chunksize is not needed. Both engines read
+    # .gz, .xz, .bz2 and .zst files.
+    if engine == "csv":
+        yield from read_delimited_csv(input_path, sep, quotechar)
+        return
+    if engine != "pandas":
+        raise ValueError(f"Unknown CSV engine '{engine}'. Use 'pandas' or 'csv'.")
+
+    import pandas as pd
+
+    # With chunksize, rows are read lazily so conversion and output of a chunk
+    # happen before the next one is read.
+    if chunksize:
+        for df in pd.read_csv(input_path, sep=sep, quotechar=quotechar, dtype=str, chunksize=chunksize):
+            yield tuple(df.columns), df.fillna("").itertuples(index=False, name=None)
+    else:
+        df = pd.read_csv(input_path, sep=sep, quotechar=quotechar, dtype=str).fillna("")
+        yield tuple(df.columns), df.itertuples(index=False, name=None)
+
+def csv_to_tbx(input_path: str, output_path: str, delimiter: str = ",", quotechar: str = '"',
+               chunksize: int = None, workers: int = None, incremental: str = None, engine: str = "pandas",
+               progress=None, compact: bool = False, value_separator: str = VALUE_SEPARATOR,
+               dialect: str = "legacy"):
+    return blocks_to_tbx(read_delimited(input_path, delimiter, quotechar, chunksize, engine), output_path,
+                         workers, incremental, progress, compact, value_separator, dialect)
+
+def tsv_to_tbx(input_path: str, output_path: str, chunksize: int = None, workers: int = None,
+               incremental: str = None, engine: str = "pandas", progress=None, compact: bool = False,
+               value_separator: str = VALUE_SEPARATOR, dialect: str = "legacy"):
+    return blocks_to_tbx(read_delimited(input_path, "\t", chunksize=chunksize, engine=engine), output_path,
+                         workers, incremental, progress, compact, value_separator, dialect)
+
+def cell_text(value) -> str:
+    # Empty cells become "", whole numbers lose the ".0" that calamine (and
+    # Excel itself) stores them with.
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def iter_calamine_rows(sheet):
+    # calamine starts its rows at column A only when it holds data: the empty
+    # columns before the first cell are padded back, so that column indexes
+    # (and "Unnamed: <index>" headers) are the same as with openpyxl
+    padding = [""] * sheet.start[1] if sheet.start else []
+    for row in sheet.iter_rows():
+        yield padding + row if padding else row
+
+def iter_sheets(input_path: str, sheets: list = None, engine: str = None):
+    # Yield (sheet, rows) pairs from a streaming, read-only workbook reader.
+    # engine is "calamine" (python-calamine), "openpyxl" or None to use
+    # calamine when it is installed. sheets=None reads the first sheet only.
+    if engine is None:
+        engine = "calamine" if find_spec("python_calamine") else "openpyxl"
+
+    if engine == "calamine":
+        from python_calamine import CalamineWorkbook
+
+        wb = CalamineWorkbook.from_path(input_path)
+        for name in sheets or wb.sheet_names[:1]:
+            yield name, iter_calamine_rows(wb.get_sheet_by_name(name))
+    elif engine == "openpyxl":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(input_path, read_only=True, data_only=True)
+        try:
+            for name in sheets or wb.sheetnames[:1]:
+                yield name, wb[name].iter_rows(values_only=True)
+        finally:
+            wb.close()
+    else:
+        raise ValueError(f"Unknown Excel engine '{engine}'. Use 'calamine' or 'openpyxl'.")
+
+def list_sheets(input_path: str) -> list:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(input_path, read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+def iter_sheet_values(rows, width: int):
+    # Like pd.read_excel, blank rows are kept except at the end of a sheet,
+    # and the strings it reads as missing values become ""
+    blank = []
+    for row in rows:
+        values = [cell_text(value) for value in row[:width]]
+        values = ["" if value in PANDAS_NA_VALUES else value for value in values]
+        values.extend([""] * (width - len(values)))
+        if not any(values):
+            blank.append(values)
+            continue
+        yield from blank
+        blank = []
+        yield values
+
+def read_workbook(input_path: str, sheets: list = None, engine: str = None):
+    # One block per sheet, with the first row as its header
+    for name, rows in iter_sheets(input_path, sheets, engine):
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            continue
+        header = unique_header([cell_text(value) for value in header])
+        yield header, iter_sheet_values(rows, len(header))
+
+def excel_to_tbx(input_path: str, output_path: str, workers: int = None, sheets: list = None,
+                 engine: str = None, incremental: str = None, progress=None, compact: bool = False,
+                 value_separator: str = VALUE_SEPARATOR, dialect: str = "legacy"):
+    return blocks_to_tbx(read_workbook(input_path, sheets, engine), output_path, workers, incremental, progress,
+                         compact, value_separator, dialect)
@@ -0,0 +1,82 @@
+from lxml import etree
+from collections import defaultdict
+
+from .compression import open_file
+from .reader import free_element
+from .writer import write_tbx, write_tbx_instrumented
+
+def detect_namespace(input_path: str) -> str:
+    # Only the start event of the root element is needed to read its nsmap
+    with open_file(input_path) as f:
+        for _, root in etree.iterparse(f, events=("start",)):
+            nsmap = root.nsmap
+            return f"{{{nsmap[None]}}}" if None in nsmap else ""
+    return ""
+
+def fitxa_to_term_entry(fitxa, ns: str) -> etree._Element:
+    term_entry = etree.Element("termEntry")
+    lang_terms = defaultdict(list)
+
+    # IATE codes
+    for denom in fitxa.iterchildren(ns + "denominacio"):
+        lang = denom.get("llengua")
+        text = denom.text.strip() if denom.text else ""
+        if not text:
+            continue
+        if lang == "cod":
+            descrip = etree.SubElement(term_entry, "descrip", type="externalCrossReference")
+            descrip.text = text
+        else:
+            lang_terms[lang].append(text)
+
+    # Definitions
+    for definicio in fitxa.iterchildren(ns + "definicio"):
+        lang = definicio.get("llengua")
+        text = definicio.text.strip() if definicio.text else ""
+        if text and lang:
+            descrip = etree.SubElement(term_entry, "descrip", type="definition")
+            descrip.attrib["{http://www.w3.org/XML/1998/namespace}lang"] = lang
+            descrip.text = text
+
+    # Subject fields
+    for area in fitxa.iterchildren(ns + "areatematica"):
+        text = area.text.strip() if area.text else ""
+        if text:
+            descrip = etree.SubElement(term_entry, "descrip", type="subjectField")
+            descrip.text = text
+
+    # Terms by language
+    for lang, terms in lang_terms.items():
+        lang_set = etree.SubElement(term_entry, "langSet", attrib={
+            "{http://www.w3.org/XML/1998/namespace}lang": lang
+        })
+        for term in terms:
+            tig = etree.SubElement(lang_set, "tig")
+            term_elem = etree.SubElement(tig, "term")
+            term_elem.text = term
+
+    return term_entry
+
+def iter_fitxas(input_path: str, ns: str):
+    # Each fitxa is freed, together with the already processed siblings, once
+    # the consumer asks for the next one, so the source DOM stays small.
+    with open_file(input_path) as f:
+        for _, fitxa in etree.iterparse(f, events=("end",), tag=ns + "fitxa"):
+            yield fitxa
+
+            free_element(fitxa)
+
+def iter_term_entries(input_path: str):
+    # Detect namespace if present
+    ns = detect_namespace(input_path)
+    for fitxa in iter_fitxas(input_path, ns):
+        yield fitxa_to_term_entry(fitxa, ns)
+
+def xml_to_tbx_extended(input_path: str, output_path: str, progress=None, compact: bool = False,
+                        dialect: str = "legacy"):
+    if progress is None:
+        write_tbx(output_path, iter_term_entries(input_path), compact, dialect)
+    else:
+        ns = detect_namespace(input_path)
+        write_tbx_instrumented(output_path, iter_fitxas(input_path, ns), lambda fitxa: fitxa_to_term_entry(fitxa, ns),
+                               progress, compact, dialect)
@@ -0,0 +1,180 @@
+import mmap
+import os
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from lxml import etree
+
+from .compression import compression_of
+from .dialect import Dialect, detect_dialect
+from .reader import (SHARDS_PER_WORKER, SHARD_FEED_BYTES, find_shards, iter_shard_elements,
+                     iter_term_entry_elements)
+
+# Checks made on every termEntry, in one streaming pass (each entry is freed
+# once checked, so memory does not grow with the file):
+#
+#   empty-term        term without text
+#   missing-lang      langSet without xml:lang
+#   duplicate-term    the same term twice in one language of an entry
+#   descrip-type      descrip without a type, or with a type outside the
+#                     expected set
+#   no-terms          termEntry without any term
+#   schema            entry rejected by the schema given with schema=
+#   syntax            the XML is not well-formed; the pass (with workers, the
+#                     shard) stops there
+#
+# Every problem is reported with the line of the offending element.
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+# descrip types written by the converters
+DESCRIP_TYPES = ("externalCrossReference", "subjectField", "definition")
+# Problems kept in the report; the rest are only counted
+MAX_ERRORS = 1000
+# termEntry structure of TBX core, used for schema="core"
+CORE_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemas", "tbxcore.dtd")
+
+@lru_cache(maxsize=None)
+def load_schema(schema_path: str):
+    # DTD, RELAX NG or XML Schema, by extension. Entries are validated one at
+    # a time, so the schema must accept termEntry as its root element.
+    if schema_path == "core":
+        schema_path = CORE_SCHEMA
+    extension = os.path.splitext(schema_path)[1].lower()
+    if extension == ".dtd":
+        return etree.DTD(schema_path)
+    if extension == ".rng":
+        return etree.RelaxNG(file=schema_path)
+    return etree.XMLSchema(file=schema_path)
+
+def new_report() -> dict:
+    return {"entries": 0, "terms": Counter(), "lang_sets": Counter(), "subject_fields": Counter(),
+            "descrip_types": Counter(), "error_counts": Counter(), "errors": []}
+
+def add_error(report: dict, line: int, code: str, message: str, max_errors: int):
+    report["error_counts"][code] += 1
+    if len(report["errors"]) < max_errors:
+        report["errors"].append((line, code, message))
+
+def check_term_entry(term_entry, report: dict, descrip_types, schema=None, line_offset: int = 0,
+                     max_errors: int = MAX_ERRORS):
+    report["entries"] += 1
+    seen = set()
+    found = False
+    for child in term_entry:
+        tag = child.tag
+        if tag == "descrip":
+            type_ = child.get("type") or ""
+            report["descrip_types"][type_] += 1
+            if type_ not in descrip_types:
+                add_error(report, child.sourceline + line_offset, "descrip-type",
+                          f"descrip of unexpected type '{type_}'" if type_ else "descrip without a type", max_errors)
+            elif type_ == "subjectField" and child.text and child.text.strip():
+                report["subject_fields"][child.text.strip()] += 1
+        elif tag == "langSet":
+            lang = child.get(XML_LANG) or ""
+            if not lang:
+                add_error(report, child.sourceline + line_offset, "missing-lang", "langSet without xml:lang", max_errors)
+            report["lang_sets"][lang] += 1
+            terms = 0
+            for term in child.iter("term"):
+                text = term.text.strip() if term.text else ""
+                if not text:
+                    add_error(report, term.sourceline + line_offset, "empty-term", "empty term", max_errors)
+                    continue
+                terms += 1
+                key = (lang, unicodedata.normalize("NFC", text))
+                if key in seen:
+                    add_error(report, term.sourceline + line_offset, "duplicate-term",
+                              f"duplicate term '{text}' ({lang})", max_errors)
+                seen.add(key)
+            if terms:
+                found = True
+                report["terms"][lang] += terms
+    if not found:
+        add_error(report, term_entry.sourceline + line_offset, "no-terms", "termEntry without terms", max_errors)
+    if schema is not None and not schema.validate(term_entry):
+        for error in schema.error_log:
+            add_error(report, error.line + line_offset, "schema", error.message, max_errors)
+
+def add_syntax_error(report: dict, error, line_offset: int, max_errors: int):
+    # libxml2 messages quote lines of their own, relative to the shard
+    message = re.sub(r"line (\d+)", lambda m: f"line {int(m.group(1)) + line_offset}", error.msg)
+    add_error(report, (error.lineno or 0) + line_offset, "syntax", message, max_errors)
+
+def merge_reports(report: dict, other: dict, max_errors: int):
+    report["entries"] += other["entries"]
+    for name in ("terms", "lang_sets", "subject_fields", "descrip_types", "error_counts"):
+        report[name].update(other[name])
+    report["errors"].extend(other["errors"][:max_errors - len(report["errors"])])
+
+def validate_shard(input_path: str, start: int, end: int, line_offset: int, descrip_types, schema_path: str = None,
+                   max_errors: int = MAX_ERRORS, dialect: Dialect = None) -> dict:
+    # Worker side of the parallel pass; see reader.iter_shard_elements. The
+    # shard is parsed under a synthetic root, so its lines are shifted by the
+    # newlines before start.
+    report = new_report()
+    schema = load_schema(schema_path) if schema_path else None
+    try:
+        for term_entry in iter_shard_elements(input_path, start, end, dialect):
+            check_term_entry(term_entry, report, descrip_types, schema, line_offset, max_errors)
+    except etree.XMLSyntaxError as e:
+        add_syntax_error(report, e, line_offset, max_errors)
+    return report
+
+def line_offsets(input_path: str, shards: list) -> list:
+    # Newlines before the start of every shard
+    offsets = []
+    count = 0
+    pos = 0
+    with open(input_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start, _ in shards:
+            for chunk in range(pos, start, SHARD_FEED_BYTES):
+                count += mm[chunk:min(chunk + SHARD_FEED_BYTES, start)].count(b"\n")
+            pos = start
+            offsets.append(count)
+    return offsets
+
+def validate_parallel(input_path: str, workers: int, descrip_types, schema_path: str = None,
+                      max_errors: int = MAX_ERRORS) -> dict:
+    # Only the termEntry elements are checked by the workers: the markup
+    # before the first and after the last one is not parsed.
+    from multiprocessing import Pool
+
+    dialect = detect_dialect(input_path)
+    shards = find_shards(input_path, workers * SHARDS_PER_WORKER, dialect.entry_name)
+    args = [(input_path, start, end, offset, descrip_types, schema_path, max_errors, dialect)
+            for (start, end), offset in zip(shards, line_offsets(input_path, shards))]
+    report = new_report()
+    with Pool(workers) as pool:
+        for other in pool.starmap(validate_shard, args):
+            merge_reports(report, other, max_errors)
+    return report
+
+def validate_tbx(input_path: str, descrip_types=DESCRIP_TYPES, schema_path: str = None, workers: int = None,
+                 max_errors: int = MAX_ERRORS, progress=None) -> dict:
+    # Returns the counts of entries, langSets and terms per language, subject
+    # fields and descrip types, and the problems found as (line, code,
+    # message), sorted by line. schema_path is a .dtd, .rng or .xsd file, or
+    # "core" for the bundled TBX core termEntry DTD.
+    descrip_types = frozenset(descrip_types)
+    schema = load_schema(schema_path) if schema_path else None
+    report = new_report()
+    try:
+        # Detecting the dialect parses the file up to its first entry
+        if workers and workers > 1 and not compression_of(input_path) and detect_dialect(input_path).shardable:
+            report = validate_parallel(input_path, workers, descrip_types, schema_path, max_errors)
+            if progress is not None:
+                progress.advance(report["entries"])
+        elif progress is None:
+            for term_entry in iter_term_entry_elements(input_path):
+                check_term_entry(term_entry, report, descrip_types, schema, 0, max_errors)
+        else:
+            for term_entry in progress.timed(iter_term_entry_elements(input_path), "read"):
+                with progress.stage("check"):
+                    check_term_entry(term_entry, report, descrip_types, schema, 0, max_errors)
+                progress.advance()
+    except etree.XMLSyntaxError as e:
+        add_syntax_error(report, e, 0, max_errors)
+    report["errors"].sort(key=lambda error: error[0])
+    return report
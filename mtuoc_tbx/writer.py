@@ -0,0 +1,86 @@
+from itertools import chain
+from lxml import etree
+
+from .compression import open_file
+from .dialect import TBX3_HEADER, TBX3_ROOT, ConceptIds, get_dialect, to_concept_entry
+
+def serialize_term_entry(term_entry, compact: bool = False, dialect: str = "legacy") -> bytes:
+    # dialect "tbx3" turns the entry into a conceptEntry first (see
+    # dialect.to_concept_entry); entries without terms then give b"".
+    if get_dialect(dialect).name == "tbx3" and not to_concept_entry(term_entry):
+        return b""
+    if compact:
+        # No indentation at all; whitespace-only text left by a pretty-printed
+        # source is dropped as well.
+        for element in term_entry.iter():
+            if len(element) and element.text and not element.text.strip():
+                element.text = None
+            if element.tail and not element.tail.strip():
+                element.tail = None
+        return etree.tostring(term_entry, encoding="UTF-8", with_tail=False)
+    # Indent the entry as a child of <body> so that the concatenated fragments
+    # are byte-identical to ElementTree.write(..., pretty_print=True).
+    etree.indent(term_entry, space="  ", level=2)
+    term_entry.tail = None
+    return etree.tostring(term_entry, encoding="UTF-8")
+
+def write_tbx_fragments(output_path: str, fragments, offsets: list = None, compact: bool = False,
+                        dialect: str = "legacy"):
+    # fragments are serialized termEntry elements (see serialize_term_entry),
+    # written in order as soon as they are produced. If offsets is given, the
+    # (offset, length) of every fragment in the file is appended to it. A
+    # .gz, .xz, .bz2 or .zst output_path is compressed. dialect "tbx3"
+    # writes TBX v3 (see mtuoc_tbx.dialect); its <body> is kept at the
+    # indentation of the legacy one. Its fragments are serialized with the
+    # same dialect, or are legacy ones converted here. Empty fragments (tbx3
+    # entries without terms) are left out, with a length of 0 in offsets.
+    tbx3 = get_dialect(dialect).name == "tbx3"
+    ids = ConceptIds() if tbx3 else None
+    indent = b"" if compact else b"\n  "
+    separator = b"" if compact else b"\n    "
+    head = (TBX3_ROOT + indent + TBX3_HEADER + indent + b"<text>") if tbx3 else b"<tbx>" + indent
+    tail = (b"</text>" if tbx3 else b"") + (b"" if compact else b"\n") + b"</tbx>\n"
+    with open_file(output_path, "wb") as f:
+        f.write(b"<?xml version='1.0' encoding='UTF-8'?>\n" + head)
+        fragments = iter(fragments)
+        fragment = next(fragments, None)
+        if fragment is None:
+            f.write(b"<body/>" + tail)
+            return
+        f.write(b"<body>")
+        for fragment in chain((fragment,), fragments):
+            if tbx3:
+                if fragment.startswith(b"<termEntry"):
+                    fragment = serialize_term_entry(etree.fromstring(fragment), compact, dialect)
+                if not fragment:
+                    if offsets is not None:
+                        offsets.append((f.tell(), 0))
+                    continue
+                fragment = ids.assign(fragment)
+            f.write(separator)
+            if offsets is not None:
+                offsets.append((f.tell(), len(fragment)))
+            f.write(fragment)
+        f.write(indent + b"</body>" + tail)
+
+def write_tbx(output_path: str, term_entries, compact: bool = False, dialect: str = "legacy"):
+    # Write each termEntry as soon as it is produced so that only one entry is
+    # held in memory.
+    fragments = (serialize_term_entry(term_entry, compact, dialect) for term_entry in term_entries)
+    write_tbx_fragments(output_path, fragments, compact=compact, dialect=dialect)
+
+def iter_instrumented_fragments(items, build, progress, compact: bool = False, dialect: str = "legacy"):
+    # items are the parsed input records and build(item) makes a termEntry
+    # of one of them; see mtuoc_tbx.progress for the stages.
+    for item in progress.timed(items, "read"):
+        with progress.stage("build"):
+            term_entry = build(item)
+        with progress.stage("serialize"):
+            fragment = serialize_term_entry(term_entry, compact, dialect)
+        progress.advance()
+        yield fragment
+
+def write_tbx_instrumented(output_path: str, items, build, progress, compact: bool = False, dialect: str = "legacy"):
+    with progress.stage("write"):
+        write_tbx_fragments(output_path, iter_instrumented_fragments(items, build, progress, compact, dialect),
+                            compact=compact, dialect=dialect)
@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mtuoc_tbx.incremental import MANIFEST_SUFFIX
+from mtuoc_tbx.tabular import csv_to_tbx
+
+ROWS = "externalCrossReference,en,ca,definition_en\n1,cat,gat,a feline\n2,dog,gos,a canine\n3,cow,vaca,a bovine\n"
+
+def write_csv(tmp_path) -> str:
+    input_path = str(tmp_path / "inc.csv")
+    with open(input_path, "w", encoding="utf-8") as f:
+        f.write(ROWS)
+    return input_path
+
+def test_full_rebuild_invalidates_manifest(tmp_path):
+    # An incremental run, a full rebuild of the same output, then an
+    # incremental run again: the manifest no longer describes the file
+    input_path = write_csv(tmp_path)
+    output_path = str(tmp_path / "inc.tbx")
+    csv_to_tbx(input_path, output_path, incremental="externalCrossReference")
+    csv_to_tbx(input_path, output_path, compact=True)
+    stats = csv_to_tbx(input_path, output_path, incremental="externalCrossReference")
+    assert stats["reused"] == 0 and stats["converted"] == 3
+    etree.parse(output_path)
+
+    reference_path = str(tmp_path / "ref.tbx")
+    csv_to_tbx(input_path, reference_path)
+    stats = csv_to_tbx(input_path, output_path, incremental="externalCrossReference")
+    assert stats["reused"] == 3
+    with open(output_path, "rb") as f, open(reference_path, "rb") as g:
+        assert f.read() == g.read()
+
+def test_slices_that_are_not_entries_are_converted(tmp_path):
+    input_path = write_csv(tmp_path)
+    output_path = str(tmp_path / "inc.tbx")
+    csv_to_tbx(input_path, output_path, incremental="externalCrossReference")
+    manifest_path = output_path + MANIFEST_SUFFIX
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    for row in manifest["rows"].values():
+        row[1] += 3
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    stats = csv_to_tbx(input_path, output_path, incremental="externalCrossReference")
+    assert stats["reused"] == 0 and stats["converted"] == 3
+    etree.parse(output_path)
@@ -0,0 +1,19 @@
+import os
+import sys
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mtuoc_tbx.merge import merge_term_entries
+
+def test_descrips_stay_before_langsets_added_by_the_merge():
+    # The target has only descrips; other has langSets followed by descrips
+    target = etree.fromstring('<termEntry><descrip type="externalCrossReference">1</descrip></termEntry>')
+    other = etree.fromstring(
+        '<termEntry><descrip type="externalCrossReference">1</descrip>'
+        '<langSet xml:lang="en"><tig><term>cat</term></tig></langSet>'
+        '<descrip type="definition" xml:lang="en">feline</descrip></termEntry>')
+    merge_term_entries(target, other)
+    assert [child.tag for child in target] == ["descrip", "descrip", "langSet"]
+    assert target[1].get("type") == "definition"